@@ -0,0 +1,82 @@
+"""
+Measures per-call overhead of
+`SimpleTaskedCallable` dispatch, with and
+without hooks, against the previous dispatch
+which stored callargs on the callable and
+walked the call stacks on every call.
+
+Run with `python benchmarks/bench_dispatch.py`
+once `tasxnat` is installed.
+"""
+
+import argparse, timeit
+import typing
+
+from tasxnat import SimpleTaskable, SimpleTaskedCallable
+
+
+class _LegacyTaskedCallable(SimpleTaskedCallable):
+    __slots__ = ("__called_args__", "__called_kwds__")
+
+    @property
+    def args(self):
+        return self.__called_args__
+
+    @property
+    def kwds(self):
+        return self.__called_kwds__
+
+    def __call__(self, *args, **kwds):
+        self.__called_args__ = args
+        self.__called_kwds__ = kwds
+
+        self.__before__()
+        rt = self.__task__(self.taskable, *self.args, **self.kwds)
+        self.__after__()
+
+        return rt
+
+    def __before__(self): #type: ignore[override]
+        for fn in reversed(self.__before_tasks__):
+            fn(self)
+
+    def __after__(self): #type: ignore[override]
+        for fn in reversed(self.__after_tasks__):
+            fn(self)
+
+
+def example_task(_, *args, **kwds):
+    ...
+
+
+def example_hook(context):
+    ...
+
+
+def _build(callable_class: type, hooks: int) -> typing.Callable:
+    taskable = SimpleTaskable.from_callable(None, example_task) #type: ignore
+    tasked   = callable_class(taskable, example_task)
+    for _ in range(hooks):
+        tasked.push_before(example_hook)
+    return tasked
+
+
+def _per_call_ns(fn: typing.Callable, number: int) -> float:
+    timer = timeit.Timer(lambda: fn("arg", kwd="kwd"))
+    return min(timer.repeat(5, number)) / number * 1e9
+
+
+def main(argv: typing.Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=200_000)
+    opts = parser.parse_args(argv)
+
+    print(f"{'hooks':>5} {'legacy ns':>10} {'current ns':>10} {'speedup':>8}")
+    for hooks in (0, 1, 4):
+        legacy  = _per_call_ns(_build(_LegacyTaskedCallable, hooks), opts.number)
+        current = _per_call_ns(_build(SimpleTaskedCallable, hooks), opts.number)
+        print(f"{hooks:>5} {legacy:>10.1f} {current:>10.1f} {legacy / current:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Measures throughput, latency and peak memory
+of `SimpleTaskBroker.process_tasks` across each
+execution path: the main thread, the thread
+pool, the process pool, coroutines run on
+worker event loops and the parallel engine
+(free threads or subinterpreters where the
+runtime has them, processes otherwise).
+
+Latency is measured around each task body.
+Every scenario runs in a fresh interpreter so
+peak RSS is not shared between scenarios.
+Results can be saved and compared against a
+saved baseline.
+
+Run with `python benchmarks/bench_execution.py`
+once `tasxnat` is installed.
+"""
+
+import argparse, asyncio, json, os, resource, struct, subprocess, sys
+import tempfile, time
+import typing
+
+from tasxnat import SimpleTaskBroker, SimpleTaskable
+
+_LATENCY_FMT = "d"
+_LATENCY_FD: dict[int, int] = {}
+_LATENCY_PATH_ENV = "TASXNAT_BENCH_LATENCY"
+_MANY_IDENTIFIERS = 32
+
+broker = SimpleTaskBroker(strict_mode=True)
+
+
+def _record_latency(start_t: float):
+    # A single O_APPEND file is shared by every
+    # thread and process. Writes this small are
+    # atomic.
+    pid = os.getpid()
+    if pid not in _LATENCY_FD:
+        _LATENCY_FD[pid] = os.open(
+            os.environ[_LATENCY_PATH_ENV],
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+
+    latency = time.perf_counter() - start_t
+    os.write(_LATENCY_FD[pid], struct.pack(_LATENCY_FMT, latency))
+
+
+def trivial(_, *args):
+    start_t = time.perf_counter()
+    _record_latency(start_t)
+
+
+def cpu_bound(_, *args):
+    start_t = time.perf_counter()
+    sum(n * n for n in range(20_000))
+    _record_latency(start_t)
+
+
+async def async_sleep(_, *args):
+    start_t = time.perf_counter()
+    await asyncio.sleep(0.001)
+    _record_latency(start_t)
+
+
+def _nested_child():
+    start_t = time.perf_counter()
+    time.sleep(0.0005)
+    _record_latency(start_t)
+
+
+def nested_threads(task: SimpleTaskable, *args):
+    task.request_new_thread(_nested_child, ((), {}), timeout=30)
+
+
+def _make_many(index: int):
+    def fn(_, *args):
+        start_t = time.perf_counter()
+        _record_latency(start_t)
+
+    fn.__name__ = fn.__qualname__ = f"many_{index}"
+    return fn
+
+
+# Distinct identifiers must be importable by
+# name for the process pool.
+for _index in range(_MANY_IDENTIFIERS):
+    globals()[f"many_{_index}"] = _make_many(_index)
+
+
+class Scenario(typing.NamedTuple):
+    identifiers: tuple[str, ...]
+    calls: int
+    nested: bool = False
+
+
+def _identifier(fn: typing.Callable) -> str:
+    return ":".join([fn.__module__, fn.__name__])
+
+
+SCENARIOS =\
+{
+    "trivial_sync": Scenario((_identifier(trivial),), 20_000),
+    "cpu_bound": Scenario((_identifier(cpu_bound),), 400),
+    "async_sleep": Scenario((_identifier(async_sleep),), 400),
+    "nested_threads": Scenario((_identifier(nested_threads),), 400, nested=True),
+    "many_identifiers":
+        Scenario(
+            tuple(_identifier(globals()[f"many_{n}"])
+                  for n in range(_MANY_IDENTIFIERS)),
+            20_000),
+    "hot_identifier": Scenario((_identifier(globals()["many_0"]),), 20_000)
+}
+
+# Engine name -> (thread_count, process_count, executor).
+ENGINES =\
+{
+    "main": (None, None, None),
+    "threads": (4, None, None),
+    "processes": (None, 2, None),
+    "processes_threads": (4, 2, None),
+    "parallel": (None, 2, "parallel")
+}
+
+
+def _register(
+        scenario: Scenario,
+        thread_count: int | None,
+        executor: str | None):
+
+    for iden in scenario.identifiers:
+        fn = globals()[iden.partition(":")[2]]
+        broker.task(
+            fn,
+            thread_count=thread_count,
+            is_strict=True,
+            executor=executor)
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return float("nan")
+    index = min(len(samples) - 1, int(round(pct * (len(samples) - 1))))
+    return samples[index]
+
+
+def _peak_rss_kb() -> int:
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(self_rss, children_rss)
+
+
+def run_scenario(name: str, engine: str) -> dict[str, float]:
+    """
+    Runs a single scenario in this process and
+    returns its measurements.
+    """
+
+    scenario = SCENARIOS[name]
+    thread_count, process_count, executor = ENGINES[engine]
+
+    # Nested thread requests require the thread
+    # pool.
+    if scenario.nested and not thread_count:
+        thread_count = 2
+    _register(scenario, thread_count, executor)
+
+    task_calls = [
+        f"{scenario.identifiers[n % len(scenario.identifiers)]}[{n}]"
+        for n in range(scenario.calls)]
+
+    start_t = time.perf_counter()
+    broker.process_tasks(*task_calls, process_count=process_count)
+    elapsed = time.perf_counter() - start_t
+
+    with open(os.environ[_LATENCY_PATH_ENV], "rb") as latency_file:
+        raw = latency_file.read()
+    samples = sorted(
+        sample for (sample,) in struct.iter_unpack(_LATENCY_FMT, raw))
+
+    return (
+        {
+            "calls": len(samples),
+            "calls_per_sec": len(samples) / elapsed,
+            "p50_ms": _percentile(samples, 0.50) * 1e3,
+            "p99_ms": _percentile(samples, 0.99) * 1e3,
+            "peak_rss_kb": _peak_rss_kb(),
+            "route": broker.routes.get(scenario.identifiers[0])
+        })
+
+
+def _run_isolated(name: str, engine: str) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = dict(os.environ)
+        env[_LATENCY_PATH_ENV] = os.path.join(tmpdir, "latency.bin")
+        proc = subprocess.run(
+            [sys.executable, __file__, "--run", name, engine],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True)
+    return json.loads(proc.stdout)
+
+
+def _format_change(current: float, baseline: float | None) -> str:
+    if not baseline:
+        return ""
+    return f"{(current - baseline) / baseline:+.1%}"
+
+
+def main(argv: typing.Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-s", "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        help="Scenario to run. Runs all scenarios if omitted.")
+    parser.add_argument(
+        "-e", "--engine",
+        action="append",
+        choices=ENGINES,
+        help="Engine to run. Runs all engines if omitted.")
+    parser.add_argument(
+        "--save",
+        metavar="PATH",
+        help="Save results as a JSON baseline.")
+    parser.add_argument(
+        "--compare",
+        metavar="PATH",
+        help="Compare results against a JSON baseline.")
+    parser.add_argument(
+        "--run",
+        nargs=2,
+        metavar=("SCENARIO", "ENGINE"),
+        help=argparse.SUPPRESS)
+    opts = parser.parse_args(argv)
+
+    if opts.run:
+        print(json.dumps(run_scenario(*opts.run)))
+        return
+
+    baseline = {}
+    if opts.compare:
+        with open(opts.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {}
+    print(
+        f"{'scenario':<18} {'engine':<18} {'calls/s':>10} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'rss MB':>7} {'Δ calls/s':>10} {'Δ p99':>8}")
+    for name in opts.scenario or SCENARIOS:
+        for engine in opts.engine or ENGINES:
+            key = f"{name}/{engine}"
+            result = results[key] = _run_isolated(name, engine)
+
+            base = baseline.get(key, {})
+            print(
+                f"{name:<18} {engine:<18} "
+                f"{result['calls_per_sec']:>10.0f} "
+                f"{result['p50_ms']:>8.3f} "
+                f"{result['p99_ms']:>8.3f} "
+                f"{result['peak_rss_kb'] / 1024:>7.1f} "
+                f"{_format_change(result['calls_per_sec'], base.get('calls_per_sec')):>10} "
+                f"{_format_change(result['p99_ms'], base.get('p99_ms')):>8}")
+
+    if opts.save:
+        with open(opts.save, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measures the per-instance memory footprint of
+`SimpleTaskable` objects (and their attached
+`TaskedCallable`) against an equivalent layout
+storing the same attributes in instance dicts.
+
+Run with `python benchmarks/bench_memory.py` once
+`tasxnat` is installed.
+"""
+
+import argparse, gc, tracemalloc
+import typing
+
+from tasxnat import SimpleTaskable, SimpleTaskBroker
+
+
+class _DictObject:
+    """Stores attributes in an instance dict."""
+
+
+def example_task(_, *args, **kwds):
+    ...
+
+
+def _slot_names(cls: type) -> tuple[str, ...]:
+    names = ()
+    for klass in cls.__mro__:
+        names += tuple(getattr(klass, "__slots__", ()))
+    return names
+
+
+def _as_dict_object(obj: typing.Any) -> _DictObject:
+    new = _DictObject()
+    for name in _slot_names(type(obj)):
+        if hasattr(obj, name):
+            setattr(new, name, getattr(obj, name))
+    return new
+
+
+def _build_slotted(broker: SimpleTaskBroker, count: int):
+    return [
+        SimpleTaskable.from_callable(broker, example_task)
+        for _ in range(count)]
+
+
+def _build_dicted(broker: SimpleTaskBroker, count: int):
+    # Slotted objects are discarded once their
+    # attributes are copied over. The copies
+    # point at each other, not the originals.
+    built = []
+    for task in _build_slotted(broker, count):
+        dicted = _as_dict_object(task)
+        dicted._task = _as_dict_object(task._task) #type: ignore[attr-defined]
+        dicted._task.__taskable__ = dicted #type: ignore[attr-defined]
+        built.append(dicted)
+    return built
+
+
+def _measure(factory: typing.Callable[[], list], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    objs = factory()
+    # Discarded objects may be held in cycles.
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del objs
+    return current / count
+
+
+def main(argv: typing.Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--count", type=int, default=100_000)
+    opts = parser.parse_args(argv)
+
+    broker = SimpleTaskBroker()
+    slotted = _measure(lambda: _build_slotted(broker, opts.count), opts.count)
+    dicted = _measure(lambda: _build_dicted(broker, opts.count), opts.count)
+
+    print(f"instances:          {opts.count}")
+    print(f"slotted bytes/task: {slotted:.1f}")
+    print(f"dicted bytes/task:  {dicted:.1f}")
+    print(f"savings:            {1 - (slotted / dicted):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Measures process pool startup of
+`SimpleTaskBroker.process_tasks` under each
+multiprocessing start method: fork, spawn and
+forkserver with preloaded task modules.
+
+Each start method runs in a fresh interpreter.
+The first batch includes starting the fork
+server; later batches reuse it.
+
+Run with `python benchmarks/bench_startup.py`
+once `tasxnat` is installed.
+"""
+
+import argparse, json, multiprocessing as mp, subprocess, sys, time
+import typing
+
+from tasxnat import SimpleTaskBroker
+
+_BATCHES = 5
+
+# Imported by name, rather than as __main__,
+# so the fork server can preload it.
+_MODULE = "bench_startup"
+
+
+def trivial(_, *args):
+    ...
+
+
+def run_method(start_method: str, process_count: int) -> dict[str, float]:
+    """
+    Runs batches under a single start method in
+    this process and returns their timings.
+    """
+
+    broker = SimpleTaskBroker(strict_mode=True, start_method=start_method)
+    broker.lazy_task(f"{_MODULE}:trivial")
+    task_calls = [f"{_MODULE}:trivial[{n}]" for n in range(process_count)]
+
+    timings = []
+    for _ in range(_BATCHES):
+        start_t = time.perf_counter()
+        broker.process_tasks(*task_calls, process_count=process_count)
+        timings.append(time.perf_counter() - start_t)
+
+    warm = sorted(timings[1:])
+    return (
+        {
+            "cold_ms": timings[0] * 1e3,
+            "warm_ms": warm[len(warm) // 2] * 1e3
+        })
+
+
+def _run_isolated(start_method: str, process_count: int) -> dict[str, float]:
+    proc = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--run", start_method,
+            "--processes", str(process_count)
+        ],
+        capture_output=True,
+        text=True,
+        check=True)
+    return json.loads(proc.stdout)
+
+
+def main(argv: typing.Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-m", "--method",
+        action="append",
+        choices=mp.get_all_start_methods(),
+        help="Start method to run. Runs all methods if omitted.")
+    parser.add_argument(
+        "-p", "--processes",
+        type=int,
+        default=4,
+        help="Worker processes per batch.")
+    parser.add_argument(
+        "--run",
+        metavar="METHOD",
+        help=argparse.SUPPRESS)
+    opts = parser.parse_args(argv)
+
+    if opts.run:
+        print(json.dumps(run_method(opts.run, opts.processes)))
+        return
+
+    print(f"{'method':<12} {'cold ms':>10} {'warm ms':>10}")
+    for start_method in opts.method or mp.get_all_start_methods():
+        result = _run_isolated(start_method, opts.processes)
+        print(
+            f"{start_method:<12} "
+            f"{result['cold_ms']:>10.1f} "
+            f"{result['warm_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,20 +5,45 @@ are used to broker calls to registered tasks.
 
 __all__ =\
 (
+    "Serializer",
+    "TaskCoordinator",
     "Taskable",
     "TaskBroker",
+    "Tracer",
     "SimpleTaskable",
     "SimpleTaskBroker",
     "SimpleTaskedCallable",
-    "AsyncTaskedCallable"
+    "AsyncTaskedCallable",
+    "PickleSerializer",
+    "MarshalSerializer",
+    "CompressedSerializer",
+    "SimpleTaskCoordinator",
+    "SimpleScheduledCall",
+    "SimpleTracer"
 )
 __version__ = (0, 0, 8)
 
-from tasxnat.protocols import Taskable, TaskBroker
+from tasxnat.protocols import\
+(
+    Serializer,
+    TaskCoordinator,
+    Taskable,
+    TaskBroker,
+    Tracer
+)
 from tasxnat.objects import\
 (
+    SimpleScheduledCall,
     SimpleTaskable,
     SimpleTaskBroker,
     SimpleTaskedCallable,
     AsyncTaskedCallable
 )
+from tasxnat.serializers import\
+(
+    PickleSerializer,
+    MarshalSerializer,
+    CompressedSerializer
+)
+from tasxnat.distributed import SimpleTaskCoordinator
+from tasxnat.tracing import SimpleTracer
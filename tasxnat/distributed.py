@@ -0,0 +1,353 @@
+"""
+Distributed execution over TCP. A coordinator
+owns parsed task calls and hands them out in
+chunks to brokers serving it, which may run in
+other processes or on other machines.
+
+Messages are framed serializer payloads. The
+results of a chunk are sent back together once
+it finishes. With the default pickle
+serializer, only connect brokers and
+coordinators which trust each other.
+"""
+
+import itertools, socket, struct, threading
+import typing
+from collections import deque
+
+from tasxnat.protocols import Serializer, TaskBroker, TaskCoordinator
+from tasxnat.serializers import PickleSerializer
+from tasxnat.utilities import _parse_task_call
+
+__all__ = (("SimpleTaskCoordinator",))
+
+_FRAME_HEADER = struct.Struct("!I")
+
+
+class _Chunk(typing.NamedTuple):
+    chunk_id: int
+    iden: str
+    indices: list[int]
+    calls: list[tuple[tuple, dict]]
+
+
+def _send_message(sock: socket.socket, serializer: Serializer, message: tuple):
+    data = serializer.dumps(message)
+    sock.sendall(_FRAME_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytearray:
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("Connection closed by peer.")
+        received += count
+    return data
+
+
+def _recv_message(sock: socket.socket, serializer: Serializer) -> tuple:
+    (size,) = _FRAME_HEADER.unpack(_recv_exactly(sock, _FRAME_HEADER.size))
+    return serializer.loads(_recv_exactly(sock, size))
+
+
+def _run_chunk(
+        broker: TaskBroker,
+        iden: str,
+        calls: list[tuple[tuple, dict]]) -> tuple[list[tuple[bool, typing.Any]], bool]:
+    """
+    Runs the calls of a chunk in order. Stops at
+    the first failure of a strict task.
+    """
+
+    # Calls reach brokers as strings. Invalid
+    # calls fail the chunk before any is run,
+    # which only ends the batch in strict mode.
+    try:
+        root_task, calls = broker.resolve_calls(iden, calls)
+    except Exception as error:
+        return [(False, error)] * len(calls), bool(broker.metadata["strict_mode"])
+
+    strict = broker.metadata["strict_mode"] and root_task.is_strict
+    outcomes = list[tuple[bool, typing.Any]]()
+    for args, kwds in calls:
+        context = root_task.invoke(*args, **kwds)
+        if context.is_success:
+            outcomes.append((True, context.result))
+            continue
+
+        outcomes.append((False, context.failure[1]))
+        if strict:
+            return outcomes, True
+    return outcomes, False
+
+
+def _portable_outcomes(
+        serializer: Serializer,
+        outcomes: list[tuple[bool, typing.Any]]) -> list[tuple[bool, typing.Any]]:
+    """
+    Replaces results and exceptions which cannot
+    be serialized with their `repr`.
+    """
+
+    portable = []
+    for is_success, value in outcomes:
+        try:
+            serializer.dumps(value)
+        except Exception:
+            value = repr(value) if is_success else RuntimeError(repr(value))
+        portable.append((is_success, value))
+    return portable
+
+
+def _serve_coordinator(
+        broker: TaskBroker,
+        address: tuple[str, int],
+        heartbeat_interval: float):
+
+    serializer = broker.metadata["serializer"]
+    send_lock = threading.Lock()
+    stopped = threading.Event()
+
+    with socket.create_connection(address) as sock:
+        def send(message: tuple):
+            with send_lock:
+                _send_message(sock, serializer, message)
+
+        # Heartbeats tell the coordinator this
+        # broker is alive during long chunks.
+        def beat():
+            while not stopped.wait(heartbeat_interval):
+                try:
+                    send(("heartbeat",))
+                except OSError:
+                    return
+
+        threading.Thread(target=beat, daemon=True).start()
+        try:
+            while True:
+                send(("pull",))
+                message = _recv_message(sock, serializer)
+                if message[0] == "stop":
+                    return
+                if message[0] != "chunk":
+                    continue
+
+                _, chunk_id, iden, calls = message
+                outcomes, fatal = _run_chunk(broker, iden, calls)
+                try:
+                    send(("done", chunk_id, outcomes, fatal))
+                except OSError:
+                    raise
+                except Exception:
+                    # Nothing was sent if serializing
+                    # the outcomes failed.
+                    outcomes = _portable_outcomes(serializer, outcomes)
+                    send(("done", chunk_id, outcomes, fatal))
+        except ConnectionError:
+            # The coordinator went away.
+            return
+        finally:
+            stopped.set()
+
+
+class SimpleTaskCoordinator(TaskCoordinator):
+    """
+    Coordinates task calls across brokers
+    connected with `SimpleTaskBroker.serve`.
+    Chunks held by a broker which disconnects or
+    misses its heartbeats are dispatched again.
+    """
+
+    __slots__ =\
+    (
+        "_accept_thread",
+        "_batch_lock",
+        "_chunk_ids",
+        "_chunk_size",
+        "_closed",
+        "_condition",
+        "_failure",
+        "_heartbeat_timeout",
+        "_listener",
+        "_pending",
+        "_results",
+        "_serializer",
+        "_unfinished"
+    )
+
+    _accept_thread: threading.Thread
+    _batch_lock: threading.Lock
+    _chunk_ids: typing.Iterator[int]
+    _chunk_size: int
+    _closed: bool
+    _condition: threading.Condition
+    _failure: BaseException | None
+    _heartbeat_timeout: float
+    _listener: socket.socket
+    _pending: deque[_Chunk]
+    _results: list[tuple[bool, typing.Any] | None]
+    _serializer: Serializer
+    _unfinished: dict[int, _Chunk]
+
+    @property
+    def address(self):
+        return self._listener.getsockname()[:2]
+
+    def process_tasks(self, *task_callers, timeout=None):
+        # Calls are grouped by task, keeping the
+        # index of each to order their results.
+        grouped = dict[str, list[tuple[int, tuple[tuple, dict]]]]()
+        for index, task_call in enumerate(task_callers):
+            iden, *callargs = _parse_task_call(task_call)
+            grouped.setdefault(iden, []).append((index, tuple(callargs)))
+
+        with self._batch_lock, self._condition:
+            self._results = [None] * len(task_callers)
+            self._failure = None
+            for iden, calls in grouped.items():
+                for n in range(0, len(calls), self._chunk_size):
+                    indices, chunk_calls = zip(*calls[n:n + self._chunk_size])
+                    chunk = _Chunk(
+                        next(self._chunk_ids),
+                        iden,
+                        list(indices),
+                        list(chunk_calls))
+                    self._pending.append(chunk)
+                    self._unfinished[chunk.chunk_id] = chunk
+            self._condition.notify_all()
+
+            finished = self._condition.wait_for(
+                lambda: not self._unfinished or self._failure,
+                timeout)
+
+            # Results arriving late for this batch
+            # are ignored.
+            failure = self._failure
+            self._pending.clear()
+            self._unfinished.clear()
+            if failure:
+                raise failure
+            if not finished:
+                raise TimeoutError("Timed out waiting on task calls.")
+            return list(self._results)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        # Closing alone does not wake a blocked
+        # accept on every platform.
+        try:
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self._serve_broker,
+                args=(sock,),
+                daemon=True).start()
+
+    def _serve_broker(self, sock: socket.socket):
+        sock.settimeout(self._heartbeat_timeout)
+        owned = set[int]()
+        try:
+            with sock:
+                while True:
+                    message = _recv_message(sock, self._serializer)
+                    if message[0] == "pull":
+                        reply = self._next_chunk(owned)
+                        _send_message(sock, self._serializer, reply)
+                        if reply[0] == "stop":
+                            return
+                    elif message[0] == "done":
+                        _, chunk_id, outcomes, fatal = message
+                        owned.discard(chunk_id)
+                        self._complete_chunk(chunk_id, outcomes, fatal)
+        except OSError:
+            # Disconnected or missed heartbeats.
+            pass
+        finally:
+            self._requeue(owned)
+
+    def _next_chunk(self, owned: set[int]) -> tuple:
+        with self._condition:
+            # Waiting for work here spares idle
+            # brokers from polling.
+            self._condition.wait_for(
+                lambda: self._pending or self._closed,
+                self._heartbeat_timeout / 2)
+            if self._closed:
+                return ("stop",)
+
+            while self._pending:
+                chunk = self._pending.popleft()
+                if chunk.chunk_id not in self._unfinished:
+                    continue
+                owned.add(chunk.chunk_id)
+                return ("chunk", chunk.chunk_id, chunk.iden, chunk.calls)
+            return ("idle",)
+
+    def _complete_chunk(
+            self,
+            chunk_id: int,
+            outcomes: list[tuple[bool, typing.Any]],
+            fatal: bool):
+
+        with self._condition:
+            # Chunks dispatched twice only count
+            # once.
+            chunk = self._unfinished.pop(chunk_id, None)
+            if not chunk:
+                return
+
+            for index, outcome in zip(chunk.indices, outcomes):
+                self._results[index] = outcome
+            if fatal and not self._failure:
+                self._failure = outcomes[-1][1]
+            self._condition.notify_all()
+
+    def _requeue(self, owned: set[int]):
+        with self._condition:
+            for chunk_id in owned:
+                if chunk_id in self._unfinished:
+                    self._pending.appendleft(self._unfinished[chunk_id])
+            self._condition.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __init__(self,
+                 address: tuple[str, int] = ("127.0.0.1", 0),
+                 *,
+                 chunk_size: int = 64,
+                 heartbeat_timeout: float = 5.0,
+                 serializer: typing.Optional[Serializer] = None):
+        self._batch_lock = threading.Lock()
+        self._chunk_ids = itertools.count()
+        self._chunk_size = chunk_size
+        self._closed = False
+        self._condition = threading.Condition()
+        self._failure = None
+        self._heartbeat_timeout = heartbeat_timeout
+        self._pending = deque()
+        self._results = []
+        self._serializer = serializer or PickleSerializer()
+        self._unfinished = {}
+
+        self._listener = socket.create_server(address)
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
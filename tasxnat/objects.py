@@ -1,24 +1,37 @@
-import inspect, time, multiprocessing as mp
+import asyncio, datetime, heapq, inspect, itertools, threading, time, weakref
+import multiprocessing as mp
+import multiprocessing.util
 import typing
+from collections import deque
+from concurrent import futures
 from multiprocessing import pool
 
 from tasxnat.protocols import\
 (
+    ScheduledCall,
+    Serializer,
     Taskable,
     TaskBroker,
+    TaskContext,
     TaskedCallable,
+    TaskQueue,
+    Tracer,
     _PoolFactory,
     _TaskableCallable,
     _TCStackCallable,
     _TCStack
 )
+from tasxnat.distributed import _serve_coordinator
+from tasxnat.serializers import PickleSerializer
 from tasxnat.utilities import *
 
 
 __all__ = (
     (
+        "SimpleScheduledCall",
         "SimpleTaskBroker",
         "SimpleTaskable",
+        "SimpleTaskContext",
         "SimpleTaskedCallable",
         "AsyncTaskedCallable"
     ))
@@ -31,29 +44,163 @@ def _simple_identifier(task: typing.Callable):
 class SimpleMetaData(typing.TypedDict):
     strict_mode: bool
     task_class: type[Taskable]
+    executor_mode: typing.Literal["thread", "process"]
+    executor_workers: int | None
+    serializer: Serializer
+    start_method: typing.Literal["fork", "spawn", "forkserver"] | None
+    max_tasks_per_worker: int | None
+    max_worker_memory: int | None
+    tracer: Tracer | None
+
+
+class SimpleIPCReport(typing.TypedDict):
+    serializer: str
+    jobs: int
+    bytes: int
+    request_bytes: int
+    result_bytes: int
+    dumps_seconds: float
+    loads_seconds: float
+
+
+class SimpleLazyTask(typing.TypedDict):
+    klass: type[Taskable] | None
+    thread_count: int | None
+    is_strict: bool | None
+    is_async: bool | None
+    options: dict[str, typing.Any]
+
+
+class SimpleTaskContext(TaskContext):
+    __slots__ =\
+    (
+        "_args",
+        "_kwds",
+        "_taskable",
+        "_result",
+        "_failure_reason",
+        "_failure_exception",
+        "_is_success",
+        "_thread_queue"
+    )
+
+    _args: tuple
+    _kwds: dict
+    _taskable: Taskable
+    _result: typing.Any
+    _failure_reason: str | None
+    _failure_exception: Exception | None
+    _is_success: bool
+    _thread_queue: TaskQueue | None
+
+    @property
+    def args(self):
+        return self._args
 
+    @args.setter
+    def args(self, args):
+        self._args = args
+
+    @property
+    def kwds(self):
+        return self._kwds
+
+    @property
+    def taskable(self):
+        return self._taskable
+
+    @property
+    def result(self):
+        return self._result
+
+    @property
+    def failure(self):
+        return (self._failure_reason, self._failure_exception)
+
+    @property
+    def is_success(self):
+        return self._is_success
+
+    def set_result(self, result: typing.Any):
+        self._result = result
+        self._failure_reason = None
+        self._is_success = True
+
+    def set_failure(self, error: Exception):
+        self._failure_reason = str(error)
+        self._failure_exception = error
+        self._is_success = False
+
+    def request_new_thread(
+            self,
+            fn,
+            callargs,
+            *,
+            timeout: int | float | None = None):
+
+        if self._taskable.thread_count <= 1:
+            raise RuntimeError(f"Threading was not enable for this task.")
+        if self._thread_queue is None:
+            raise RuntimeError(
+                "Threads can only be requested by calls run in a thread pool.")
+
+        tracer = getattr(self._taskable.broker, "metadata", {}).get("tracer")
+        if tracer:
+            fn = _trace_subtask(tracer, fn, self._taskable.identifier)
+
+        tqueue = self._thread_queue
+        request_t = time.monotonic()
+        while (len(tqueue) + 1) == tqueue.maxlen:
+            time.sleep(0.1)
+            curr_t = time.monotonic()
+            if timeout and (curr_t - request_t) > timeout:
+                raise TimeoutError("Thread request took too long.")
+
+        tqueue.append((fn, callargs))
+
+    def __init__(self,
+                 taskable: Taskable,
+                 args: tuple,
+                 kwds: dict,
+                 thread_queue: TaskQueue | None = None):
+        self._taskable = taskable
+        self._args = args
+        self._kwds = kwds
+        self._result = None
+        self._failure_reason = "Task was never handled."
+        self._failure_exception = None
+        self._is_success = False
+        self._thread_queue = thread_queue
 
 
 class SimpleTaskedCallable(TaskedCallable):
+    __slots__ =\
+    (
+        "_is_async",
+        "_has_hooks",
+        "_before_plan",
+        "_after_plan",
+        "_before_independent",
+        "_after_independent",
+        "__taskable__",
+        "__task__",
+        "__before_tasks__",
+        "__after_tasks__",
+        "__name__"
+    )
+
     _is_async: bool
+    _has_hooks: bool
+    _before_plan: tuple
+    _after_plan: tuple
+    _before_independent: set[int]
+    _after_independent: set[int]
 
     __taskable__: "Taskable"
     __task__: _TaskableCallable
     __before_tasks__: _TCStack
     __after_tasks__: _TCStack
 
-    @property
-    def args(self):
-        return self.__called_args__
-
-    @args.setter
-    def args(self, args):
-        self.__called_args__ = args
-
-    @property
-    def kwds(self):
-        return self.__called_kwds__
-
     @property
     def is_async(self):
         return self._is_async
@@ -62,83 +209,198 @@ class SimpleTaskedCallable(TaskedCallable):
     def taskable(self):
         return self.__taskable__
 
-    def push_before(self, fn):
+    # Independence is kept by position in its
+    # stack. Hooks need not be hashable, and may
+    # be pushed to both stacks.
+    def push_before(self, fn, *, independent=False):
         self.__before_tasks__.append(fn)
+        if independent:
+            self._before_independent.add(len(self.__before_tasks__) - 1)
+        self._compile_plan()
 
-    def push_after(self, fn):
+    def push_after(self, fn, *, independent=False):
         self.__after_tasks__.append(fn)
+        if independent:
+            self._after_independent.add(len(self.__after_tasks__) - 1)
+        self._compile_plan()
 
     def __init__(self, parent, fn, *, is_async: bool | None = None):
         self.__taskable__ = parent
         self.__task__ = fn
         self.__before_tasks__ = [] #type: ignore[assignment]
         self.__after_tasks__ = [] #type: ignore[assignment]
+        self._before_independent = set()
+        self._after_independent = set()
 
         self._is_async = is_async or False
+        self._compile_plan()
 
-        setattr(self, "__name__", fn.__name__)
-        setattr(self, "__module__", fn.__module__)
+        # `__module__` cannot be a slot as it
+        # conflicts with the class attribute.
+        self.__name__ = fn.__name__
 
     def __call__(self, *args, **kwds):
-        self.__called_args__ = args
-        self.__called_kwds__ = kwds
-
-        self.__before__()
-        rt = self.__task__(self.taskable, *self.args, **self.kwds)
-        self.__after__()
+        # Fast path. Nothing can observe or
+        # modify the callargs.
+        if not self._has_hooks:
+            return self.__task__(self.__taskable__, *args, **kwds)
+        return self.invoke(SimpleTaskContext(self.__taskable__, args, kwds))
+
+    def invoke(self, context):
+        if not self._has_hooks:
+            return self.__task__(
+                self.__taskable__,
+                *context.args,
+                **context.kwds)
+
+        self.__before__(context)
+        rt = self.__task__(self.__taskable__, *context.args, **context.kwds)
+        self.__after__(context)
 
         return rt
 
-    def __before__(self):
-        for fn in reversed(self.__before_tasks__):
-            fn(self)
+    def __before__(self, context):
+        for fn in self._before_plan:
+            fn(context)
 
-    def __after__(self) -> None:
-        for fn in reversed(self.__after_tasks__):
-            fn(self)
+    def __after__(self, context) -> None:
+        for fn in self._after_plan:
+            fn(context)
+
+    def _compile_plan(self):
+        """
+        Prepares the call stacks ahead of time
+        so calls do not have to.
+        """
+
+        self._before_plan = tuple(reversed(self.__before_tasks__))
+        self._after_plan = tuple(reversed(self.__after_tasks__))
+        self._has_hooks = bool(self._before_plan or self._after_plan)
 
 
 class AsyncTaskedCallable(SimpleTaskedCallable):
+    __slots__ = ()
 
     async def __call__(self, *args, **kwds):
-        self.__called_args__ = args
-        self.__called_kwds__ = kwds
-
-        await self.__before__()
-        rt = await self.__task__(self.__taskable__, *self.args, **self.kwds)
-        await self.__after__()
+        if not self._has_hooks:
+            return await self.__task__(self.__taskable__, *args, **kwds)
+        return await self.invoke(
+            SimpleTaskContext(self.__taskable__, args, kwds))
+
+    async def invoke(self, context):
+        if not self._has_hooks:
+            return await self.__task__(
+                self.__taskable__,
+                *context.args,
+                **context.kwds)
+
+        await self.__before__(context)
+        rt = await self.__task__(
+            self.__taskable__,
+            *context.args,
+            **context.kwds)
+        await self.__after__(context)
 
         return rt
 
-    async def __before__(self):
-        for fn in reversed(self.__before_tasks__):
-            await self._handle_procedure(fn)
-
-    async def __after__(self):
-        for fn in reversed(self.__after_tasks__):
-            await self._handle_procedure(fn)
-
-    async def _handle_procedure(self, fn: _TCStackCallable):
-        if inspect.iscoroutinefunction(fn):
-            await fn(self)
-        else:
-            fn(self)
+    async def __before__(self, context):
+        await self._run_stages(self._before_plan, context)
+
+    async def __after__(self, context):
+        await self._run_stages(self._after_plan, context)
+
+    @staticmethod
+    async def _run_stages(stages: tuple, context: TaskContext):
+        for stage in stages:
+            if len(stage) == 1:
+                fn, is_coro = stage[0]
+                if is_coro:
+                    await fn(context)
+                else:
+                    fn(context)
+                continue
+
+            # Independent hooks run together. Sync
+            # hooks are offloaded so they do not
+            # block the loop.
+            await asyncio.gather(*(
+                fn(context) if is_coro else asyncio.to_thread(fn, context)
+                for fn, is_coro in stage))
+
+    def _compile_plan(self):
+        # Classify procedures once instead of on
+        # every call.
+        self._before_plan = self._compile_stages(
+            self.__before_tasks__,
+            self._before_independent)
+        self._after_plan = self._compile_stages(
+            self.__after_tasks__,
+            self._after_independent)
+        self._has_hooks = bool(self._before_plan or self._after_plan)
+
+    @staticmethod
+    def _compile_stages(tasks: _TCStack, independent: set[int]) -> tuple:
+        """
+        Groups neighbouring independent hooks into
+        a single stage. Every other hook is a stage
+        of its own. `independent` holds positions
+        in `tasks`.
+        """
+
+        stages = list[list[tuple[typing.Callable, bool]]]()
+        grouping = False
+        for index in reversed(range(len(tasks))):
+            fn = tasks[index]
+            step = (fn, inspect.iscoroutinefunction(fn))
+            if index in independent and grouping:
+                stages[-1].append(step)
+            else:
+                stages.append([step])
+            grouping = index in independent
+        return tuple(tuple(stage) for stage in stages)
 
 
 class SimpleTaskable(Taskable):
+    __slots__ =\
+    (
+        "_broker",
+        "_failure_reason",
+        "_failure_exception",
+        "_fn",
+        "_hedge_percentile",
+        "_identifier",
+        "_is_strict",
+        "_is_success",
+        "_min_thread_count",
+        "_route_key",
+        "_setup",
+        "_teardown",
+        "_thread_count",
+        "_task",
+        "_tracer"
+    )
+
     callable_class: typing.ClassVar[type[TaskedCallable] | None] = None
 
     _broker: TaskBroker
     _failure_reason: str | None
     _failure_exception: Exception | None
+    _fn: typing.Callable
+    _hedge_percentile: float | None
+    _identifier: str
     _is_strict: bool
     _is_success: bool
+    _min_thread_count: int
+    _route_key: typing.Callable[..., typing.Hashable] | None
+    _setup: typing.Callable[[], typing.Any] | None
+    _teardown: typing.Callable[[typing.Any], None] | None
     _thread_count: int
     _task: TaskedCallable
+    _tracer: Tracer | None
 
     @property
     def identifier(self):
-        return _simple_identifier(self._task)
+        return self._identifier
 
     @property
     def broker(self):
@@ -152,6 +414,47 @@ class SimpleTaskable(Taskable):
     def thread_count(self):
         return self._thread_count
 
+    @property
+    def min_thread_count(self):
+        return self._min_thread_count
+
+    @property
+    def route_key(self):
+        return self._route_key
+
+    @property
+    def hedge_percentile(self):
+        return self._hedge_percentile
+
+    @property
+    def signature(self):
+        try:
+            signature = inspect.signature(self._fn, eval_str=True)
+        except NameError:
+            signature = inspect.signature(self._fn)
+        except (TypeError, ValueError):
+            return None
+
+        # The taskable is passed as the first
+        # positional argument. `*args` takes it
+        # along with the rest, so is kept.
+        parameters = list(signature.parameters.values())
+        if parameters and parameters[0].kind in (
+                inspect.Parameter.POSITIONAL_ONLY,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD):
+            parameters = parameters[1:]
+        return signature.replace(parameters=parameters)
+
+    @property
+    def resource(self):
+        if not self._setup:
+            return None
+
+        resources = _thread_resources()
+        if self._identifier not in resources:
+            resources[self._identifier] = (self._setup(), self._teardown)
+        return resources[self._identifier][0]
+
     @property
     def is_async(self):
         return self._task.is_async
@@ -165,17 +468,92 @@ class SimpleTaskable(Taskable):
         return self._is_success
 
     def handle(self, *args, **kwds):
+        context = self.invoke(*args, **kwds)
+        self._failure_reason, self._failure_exception = context.failure
+        if context.is_success:
+            self._is_success = True
+
+    def invoke(self, *args, **kwds):
+        if self._tracer and self._tracer.sample():
+            return self._invoke_traced(args, kwds)
+
+        context = SimpleTaskContext(self, args, kwds, _THREAD_QUEUE.get())
+        token   = _CALL_CONTEXT.set(context)
         try:
-            result = self._task(*args, **kwds)
+            result = self._task.invoke(context)
             if self.is_async:
-                _handle_coroutine(result)
+                result = _handle_coroutine(result)
         except Exception as error:
-            self._failure_reason = str(error)
-            self._failure_exception = error
-            return
-
-        self._failure_reason = None
-        self._is_success = True
+            context.set_failure(error)
+            return context
+        finally:
+            _CALL_CONTEXT.reset(token)
+
+        context.set_result(result)
+        return context
+
+    def _invoke_traced(self, args: tuple, kwds: dict) -> SimpleTaskContext:
+        """
+        Invokes this task with its hook stacks and
+        body traced as separate spans.
+        """
+
+        tracer  = typing.cast(Tracer, self._tracer)
+        context = SimpleTaskContext(self, args, kwds, _THREAD_QUEUE.get())
+        task    = self._task
+        settle  = _handle_coroutine if self.is_async else lambda result: result
+
+        with tracer.span("call", task=self._identifier):
+            token = _CALL_CONTEXT.set(context)
+            try:
+                if not isinstance(task, SimpleTaskedCallable):
+                    with tracer.span("body"):
+                        result = settle(task.invoke(context))
+                else:
+                    if task._has_hooks:
+                        with tracer.span("hooks.before"):
+                            settle(task.__before__(context))
+                    with tracer.span("body"):
+                        result = settle(
+                            task.__task__(self, *context.args, **context.kwds))
+                    if task._has_hooks:
+                        with tracer.span("hooks.after"):
+                            settle(task.__after__(context))
+            except Exception as error:
+                context.set_failure(error)
+                return context
+            finally:
+                _CALL_CONTEXT.reset(token)
+
+        context.set_result(result)
+        return context
+
+    async def ainvoke(self, *args, **kwds):
+        # Coroutines interleave on a thread, so
+        # their spans are recorded once they end.
+        traced   = self._tracer and self._tracer.sample()
+        start_ns = time.time_ns() if traced else 0
+
+        context = SimpleTaskContext(self, args, kwds, _THREAD_QUEUE.get())
+        token   = _CALL_CONTEXT.set(context)
+        try:
+            result = self._task.invoke(context)
+            if self.is_async:
+                result = await result
+        except Exception as error:
+            context.set_failure(error)
+        else:
+            context.set_result(result)
+        finally:
+            _CALL_CONTEXT.reset(token)
+
+        if traced:
+            self._tracer.record( #type: ignore[union-attr]
+                "call",
+                start_ns,
+                time.time_ns(),
+                task=self._identifier)
+        return context
 
     @classmethod
     def from_callable(cls,
@@ -183,15 +561,9 @@ class SimpleTaskable(Taskable):
                       fn,
                       thread_count=None,
                       is_strict=None,
-                      is_async=None):
-        return cls(broker, fn, thread_count, is_strict, is_async)
-
-    def set_thread_pool(self, pool, queue):
-        if self.thread_count <= 1:
-            raise RuntimeError(f"Threading was not enable for this task.")
-
-        self._thread_pool = pool
-        self._thread_queue = queue
+                      is_async=None,
+                      **options):
+        return cls(broker, fn, thread_count, is_strict, is_async, **options)
 
     def request_new_thread(
             self,
@@ -200,28 +572,44 @@ class SimpleTaskable(Taskable):
             *,
             timeout: int | float | None = None):
 
-        if self.thread_count <= 1:
-            raise RuntimeError(f"Threading was not enable for this task.")
-
-        tqueue = self._thread_queue
-        request_t = time.monotonic()
-        while (len(tqueue) + 1) == tqueue.maxlen:
-            time.sleep(0.1)
-            curr_t = time.monotonic()
-            if timeout and (curr_t - request_t) > timeout:
-                raise TimeoutError("Thread request took too long.")
-
-        tqueue.append((fn, callargs))
+        # Requests go to the batch running the
+        # call in progress, as concurrent batches
+        # share this task.
+        context = _CALL_CONTEXT.get()
+        if not context or context.taskable is not self:
+            raise RuntimeError(
+                "Threads can only be requested during a call to this task.")
+        context.request_new_thread(fn, callargs, timeout=timeout)
 
     def __init__(self,
                  broker: TaskBroker,
                  fn: typing.Callable,
                  thread_count: typing.Optional[int] = None,
                  is_strict: typing.Optional[bool] = None,
-                 is_async: typing.Optional[bool] = None):
+                 is_async: typing.Optional[bool] = None,
+                 *,
+                 min_thread_count: typing.Optional[int] = None,
+                 route_key: typing.Optional[
+                     typing.Callable[..., typing.Hashable]] = None,
+                 hedge_percentile: typing.Optional[float] = None,
+                 setup: typing.Optional[typing.Callable[[], typing.Any]] = None,
+                 teardown: typing.Optional[
+                     typing.Callable[[typing.Any], None]] = None):
         self._broker = broker
         self._failure_reason = "Task was never handled."
         self._failure_exception = None
+        self._fn = fn
+        self._identifier = _simple_identifier(fn)
+        self._route_key = route_key
+        self._hedge_percentile = hedge_percentile
+        self._setup = setup
+        self._teardown = teardown
+        self._tracer = getattr(broker, "metadata", {}).get("tracer")
+
+        if hedge_percentile is not None and not 0 < hedge_percentile < 1:
+            raise ValueError(
+                f"hedge_percentile must be between 0 and 1, got {hedge_percentile!r}")
+        _check_route_key(route_key)
 
         is_async =\
         is_async if is_async is not None else inspect.iscoroutinefunction(fn)
@@ -236,31 +624,217 @@ class SimpleTaskable(Taskable):
             self._task = self.callable_class(self, fn)
 
         self._thread_count = thread_count or 1
+        self._min_thread_count = min(
+            min_thread_count or self._thread_count,
+            self._thread_count)
 
         # Flag parsing goes here.
         self._is_strict = is_strict or False
         self._is_success = False
 
 
+# Broker of this worker process. Installed once
+# per worker by the pool initializer so jobs do
+# not carry it.
+_WORKER_BROKER: "SimpleTaskBroker | None" = None
+
+# Set by the first strict failure of a batch so
+# every worker process stops early.
+_WORKER_CANCEL_EVENT: typing.Any = None
+
+
+def _init_worker_broker(
+        broker: "SimpleTaskBroker",
+        cancel_event: typing.Any = None):
+    global _WORKER_BROKER, _WORKER_CANCEL_EVENT
+    _WORKER_BROKER = broker
+    _WORKER_CANCEL_EVENT = cancel_event
+
+    # Worker processes skip `atexit`, but run
+    # multiprocessing finalizers.
+    multiprocessing.util.Finalize(
+        None,
+        broker._thread_pools.shutdown,
+        exitpriority=10)
+
+
+def _run_worker_job(
+        iden: str,
+        payload: bytes,
+        is_coerced: bool,
+        parent_span: str | None = None) -> bytes:
+    """
+    Runs a serialized job on the broker of this
+    worker process. `is_coerced` tells whether
+    the parent converted its calls. Returns the
+    seconds spent deserializing and the import
+    timings of tasks the job imported,
+    serialized.
+    """
+
+    broker = typing.cast("SimpleTaskBroker", _WORKER_BROKER)
+    serializer = broker.metadata["serializer"]
+    tracer = broker.metadata["tracer"]
+    imported = set(broker.__import_report__)
+    with _span(tracer, "job", parent=parent_span, task=iden):
+        start_t = time.perf_counter()
+        with _span(tracer, "ipc.loads"):
+            calls = serializer.loads(payload)
+        loads_t = time.perf_counter() - start_t
+
+        broker._process_tasks(iden, calls, is_coerced)
+
+    imports = {
+        name: elapsed
+        for name, elapsed in broker.__import_report__.items()
+        if name not in imported}
+    return serializer.dumps((loads_t, imports))
+
+
+def _submit_to_worker_broker(iden: str, payload: bytes) -> bytes:
+    serializer = _WORKER_BROKER.metadata["serializer"] #type: ignore[union-attr]
+    args, kwds = serializer.loads(payload)
+    result = _WORKER_BROKER._submit_task(iden, args, kwds) #type: ignore[union-attr]
+    return serializer.dumps(result)
+
+
+_AUTO_PROFILE_CALLS = 5
+
+
+def _chain_future(
+        future: futures.Future,
+        transform: typing.Callable[[typing.Any], typing.Any]) -> futures.Future:
+    """
+    Returns a future resolving to the result of
+    `future` passed through `transform`.
+    """
+
+    chained = futures.Future[typing.Any]()
+    chained.set_running_or_notify_cancel()
+
+    def done(inner: futures.Future):
+        error = inner.exception()
+        if error:
+            chained.set_exception(error)
+            return
+        try:
+            chained.set_result(transform(inner.result()))
+        except Exception as transform_error:
+            chained.set_exception(transform_error)
+
+    future.add_done_callback(done)
+    return chained
+
+
+class SimpleScheduledCall(ScheduledCall):
+    __slots__ =\
+    (
+        "_identifier",
+        "_args",
+        "_kwds",
+        "_every",
+        "_error",
+        "_future",
+        "_is_cancelled"
+    )
+
+    _identifier: str
+    _args: tuple
+    _kwds: dict
+    _every: float | None
+    _error: BaseException | None
+    _future: futures.Future | None
+    _is_cancelled: bool
+
+    @property
+    def identifier(self):
+        return self._identifier
+
+    @property
+    def every(self):
+        return self._every
+
+    @property
+    def error(self):
+        return self._error
+
+    @property
+    def future(self):
+        return self._future
+
+    @property
+    def is_cancelled(self):
+        return self._is_cancelled
+
+    def cancel(self):
+        # Cancelled calls are dropped from the
+        # schedule once they come due.
+        self._is_cancelled = True
+
+    def __init__(self,
+                 identifier: str,
+                 args: tuple,
+                 kwds: dict,
+                 every: float | None = None):
+        self._identifier = identifier
+        self._args = args
+        self._kwds = kwds
+        self._every = every
+        self._error = None
+        self._future = None
+        self._is_cancelled = False
+
+
 class SimpleTaskBroker(TaskBroker):
 
+    _executor: futures.Executor | None
+    _executor_lock: threading.Lock
+    _lanes: list[futures.Executor]
     _pool_factory: _PoolFactory
     _pool_max_timeout: typing.ClassVar[float | int] = 30
+    _schedule: list[tuple[float, int, SimpleScheduledCall]]
+    _schedule_cond: threading.Condition
+    _schedule_seq: typing.Iterator[int]
+    _scheduler: threading.Thread | None
+    _thread_pools: _ThreadPools
 
     __metadata__: SimpleMetaData
-    __register__: dict[str, Taskable] 
+    __register__: dict[str, Taskable]
+    __lazy_register__: dict[str, SimpleLazyTask]
+    __import_report__: dict[str, float]
+    __executors__: dict[str, str]
+    __profiles__: dict[str, list[tuple[float, float]]]
+    __routes__: dict[str, str]
+    __latencies__: dict[str, deque[float]]
+    __scalers__: dict[tuple[str, int], _ThreadScaler]
+    __ipc_report__: SimpleIPCReport | None
+    __coercers__: dict[str, _Coercer | None]
 
     @property
     def metadata(self):
         return self.__metadata__
 
+    @property
+    def ipc_report(self):
+        return dict(self.__ipc_report__ or {})
+
+    @property
+    def import_report(self):
+        return dict(self.__import_report__)
+
+    @property
+    def routes(self):
+        return dict(self.__routes__)
+
     def task(self,
              fn=None,
              *,
              klass=None,
              thread_count=None,
              is_strict=None,
-             is_async=None):
+             is_async=None,
+             executor=None,
+             **options):
 
         klass = klass or self.metadata["task_class"]
 
@@ -270,73 +844,679 @@ class SimpleTaskBroker(TaskBroker):
                 func,
                 thread_count,
                 is_strict,
-                is_async)
+                is_async,
+                **options)
             self.register_task(task)
+            if executor:
+                self.__executors__[task.identifier] = executor
             return func
 
         if fn:
             return wrapper(fn)
         return wrapper
 
-    def before(self, fn1, fn2=None):
+    def lazy_task(self,
+                  identifier,
+                  *,
+                  klass=None,
+                  thread_count=None,
+                  is_strict=None,
+                  is_async=None,
+                  executor=None,
+                  **options):
+
+        _check_route_key(options.get("route_key"))
+        if executor:
+            self.__executors__[identifier] = executor
+        self.__lazy_register__[identifier] = (
+            {
+                "klass": klass,
+                "thread_count": thread_count,
+                "is_strict": is_strict,
+                "is_async": is_async,
+                "options": options
+            })
+
+    def before(self, fn1, fn2=None, *, independent=False):
         task_getter = lambda fn:  self.__register__[_simple_identifier(fn)]
 
         if fn2:
             task = task_getter(fn1)
-            task._task.push_before(fn2)
+            task._task.push_before(fn2, independent=independent)
             return fn1
 
         def inner(fn):
             task = task_getter(fn)
-            task._task.push_before(fn1)
+            task._task.push_before(fn1, independent=independent)
             return fn
 
         return inner
 
-    def after(self, fn1, fn2=None):
+    def after(self, fn1, fn2=None, *, independent=False):
         task_getter = lambda fn:  self.__register__[_simple_identifier(fn)]
 
         if fn2:
             task = task_getter(fn1)
-            task._task.push_after(fn2)
+            task._task.push_after(fn2, independent=independent)
             return fn1
 
         def inner(fn):
             task = task_getter(fn)
-            task._task.push_after(fn1)
+            task._task.push_after(fn1, independent=independent)
             return fn
 
         return inner
 
+    def serve(self, address, *, heartbeat_interval=1.0):
+        _serve_coordinator(self, address, heartbeat_interval)
+
     def register_task(self, taskable):
         self.__register__[taskable.identifier] = taskable
 
+        # Task calls are converted against the
+        # task's signature before dispatch. Tasks
+        # without one are passed through as is.
+        signature = getattr(taskable, "signature", None)
+        self.__coercers__[taskable.identifier] = (
+            _compile_coercer(taskable.identifier, signature)
+            if signature else None)
+
+    def resolve_calls(self, identifier, calls):
+        return self._get_task(identifier), self._coerce_calls(identifier, calls)
+
+    def _coerce_calls(
+            self,
+            iden: str,
+            calls: typing.Iterable[tuple[tuple, dict]]) -> typing.Iterable[tuple[tuple, dict]]:
+        coercer = self.__coercers__.get(iden)
+        if not coercer:
+            return calls
+        return [coercer(args, kwds) for args, kwds in calls]
+
+    def _resolve_calls(
+            self,
+            iden: str,
+            calls: typing.Iterable[tuple[tuple, dict]],
+            is_coerced: bool) -> tuple[Taskable, typing.Iterable[tuple[tuple, dict]]]:
+        """
+        Gets the task of `iden`. Calls of a lazy
+        task are converted once it is imported,
+        as they could not be before dispatch.
+        Whether they were travels with the calls,
+        as this broker may have imported the task
+        since.
+        """
+
+        root_task = self._get_task(iden)
+        if not is_coerced:
+            calls = self._coerce_calls(iden, calls)
+        return root_task, calls
+
+    def _get_task(self, iden: str) -> Taskable:
+        if iden in self.__register__:
+            return self.__register__[iden]
+        if iden not in self.__lazy_register__:
+            raise KeyError(iden)
+
+        # Importing the module may register the
+        # task itself if it was decorated using
+        # this broker.
+        fn, elapsed = _import_task(iden)
+        self.__import_report__[iden] = elapsed
+        if iden in self.__register__:
+            return self.__register__[iden]
+
+        # Tasks are registered under the module
+        # defining them, which a re-exported task
+        # does not share with `iden`.
+        task = self.__register__.get(_simple_identifier(fn))
+        if not task:
+            lazy  = self.__lazy_register__[iden]
+            klass = lazy["klass"] or self.metadata["task_class"]
+            task  = klass.from_callable(
+                self,
+                fn,
+                lazy["thread_count"],
+                lazy["is_strict"],
+                lazy["is_async"],
+                **lazy["options"])
+            self.register_task(task)
+
+        self.__register__[iden] = task
+        self.__coercers__[iden] = self.__coercers__.get(task.identifier)
+        return task
+
     def process_tasks(self, *task_callers, process_count=None):
-        task_call_maps = _flatten_to_taskmaps(*task_callers)
+        tracer = self.metadata["tracer"]
+        with _span(tracer, "batch", calls=len(task_callers)):
+            with _span(tracer, "parse"):
+                coerced = set[str]()
+                task_call_maps = []
+                for iden, calls in _flatten_to_taskmaps(*task_callers):
+                    if iden in self.__coercers__:
+                        coerced.add(iden)
+                    task_call_maps.append((iden, self._coerce_calls(iden, calls)))
+
+            # Tasks with automatic engine selection
+            # are routed from this process.
+            auto_maps = [
+                (iden, calls) for iden, calls in task_call_maps
+                if self.__executors__.get(iden) in ("auto", "parallel")]
+            if auto_maps:
+                cancel_event = threading.Event()
+                task_call_maps = [
+                    (iden, calls) for iden, calls in task_call_maps
+                    if self.__executors__.get(iden) not in ("auto", "parallel")]
+                for iden, calls in auto_maps:
+                    self._process_tasks_auto(
+                        iden,
+                        calls,
+                        iden in coerced,
+                        process_count,
+                        cancel_event)
+
+            # Don't even bother with multiproc mode.
+            # Run in main thread syncronously.
+            if not process_count or process_count == 1:
+                cancel_event = threading.Event()
+                for iden, calls in task_call_maps:
+                    self._process_tasks(iden, calls, iden in coerced, cancel_event)
+                return
+
+            self._process_tasks_pool(task_call_maps, coerced, process_count)
+
+    def _get_route_key(self, iden: str):
+        if iden in self.__register__:
+            return self.__register__[iden].route_key
+
+        # Avoid importing lazy tasks just to
+        # route their calls.
+        if iden in self.__lazy_register__:
+            return self.__lazy_register__[iden]["options"].get("route_key")
+        return None
+
+    def _process_tasks_pool(
+            self,
+            task_call_maps: list[tuple[str, typing.Iterable[tuple[tuple, dict]]]],
+            coerced: set[str],
+            process_count: int):
+
+        # Calls sharing a routing key are kept in
+        # the same job, and so run in order in one
+        # worker. Jobs are not pinned to workers,
+        # so a key only keeps its worker for the
+        # length of this batch.
+        routed_maps = []
+        for iden, calls in task_call_maps:
+            route_key = self._get_route_key(iden)
+            if not route_key:
+                routed_maps.append((iden, calls))
+                continue
+            for lane in _partition_calls(route_key, calls, process_count):
+                if lane:
+                    routed_maps.append((iden, lane))
+
+        # Recycled workers retire between jobs, so
+        # unrouted calls are split into jobs no
+        # larger than a worker's task limit.
+        max_tasks = self.metadata["max_tasks_per_worker"]
+        max_memory = self.metadata["max_worker_memory"]
+        if max_tasks or max_memory:
+            chunk = max_tasks or _RECYCLE_CHUNK
+            chunked_maps = []
+            for iden, calls in routed_maps:
+                calls = list(calls)
+                if self._get_route_key(iden):
+                    chunked_maps.append((iden, calls))
+                    continue
+                for n in range(0, len(calls), chunk):
+                    chunked_maps.append((iden, calls[n:n + chunk]))
+            routed_maps = chunked_maps
+
+        tracer = self.metadata["tracer"]
+        serializer = self.metadata["serializer"]
+        payloads, dumps_t, nbytes = [], 0.0, 0
+        start_ns = time.time_ns()
+        for iden, calls in routed_maps:
+            start_t = time.perf_counter()
+            payload = serializer.dumps(list(calls))
+            dumps_t += time.perf_counter() - start_t
+            nbytes  += len(payload)
+            payloads.append((iden, payload))
+        if tracer:
+            tracer.record(
+                "ipc.dumps",
+                start_ns,
+                time.time_ns(),
+                jobs=len(payloads),
+                bytes=nbytes)
+
+        # Workers share the event so the first
+        # failure stops the whole pool. The broker
+        # is installed once per worker rather than
+        # sent with every job.
+        context = self._get_mp_context()
+        cancel_event = context.Event()
+        with _span(tracer, "pool", processes=process_count) as pool_span,\
+             _RecyclingPool(
+                process_count,
+                initializer=_init_worker_broker,
+                initargs=(self, cancel_event),
+                maxtasksperchild=1 if max_tasks else None,
+                max_memory=max_memory,
+                context=context) as p:
+            # Jobs are sent one by one so the parent
+            # cancels the batch as soon as any job
+            # fails, not once every job is done.
+            jobs = [
+                p.apply_async(
+                    _run_worker_job,
+                    (iden, payload, iden in coerced, pool_span),
+                    error_callback=lambda _: cancel_event.set())
+                for iden, payload in payloads]
+            deadline = time.monotonic() + self._pool_max_timeout
+            replies = [
+                job.get(max(0.0, deadline - time.monotonic()))
+                for job in jobs]
+
+            # Let workers exit on their own so their
+            # resources are torn down.
+            p.close()
+            p.join()
+
+        loads_t, result_bytes = 0.0, 0
+        for reply in replies:
+            start_t = time.perf_counter()
+            job_loads_t, imports = serializer.loads(reply)
+            loads_t += job_loads_t + time.perf_counter() - start_t
+            result_bytes += len(reply)
+            self._merge_import_report(imports)
+
+        self.__ipc_report__ = (
+            {
+                "serializer": serializer.name,
+                "jobs": len(payloads),
+                "bytes": nbytes + result_bytes,
+                "request_bytes": nbytes,
+                "result_bytes": result_bytes,
+                "dumps_seconds": dumps_t,
+                "loads_seconds": loads_t
+            })
 
-        # Don't even bother with multiproc mode.
-        # Run in main thread syncronously.
-        if not process_count or process_count == 1:
-            for iden, calls in task_call_maps:
-                self._process_tasks(iden, calls)
-            return
+    def submit(self, identifier, /, *args, **kwds):
+        route_key = self._get_route_key(identifier)
+        if route_key:
+            lanes = self._get_lanes()
+            executor = lanes[_route_index(route_key(*args, **kwds), len(lanes))]
+        else:
+            executor = self._get_executor()
+
+        if isinstance(executor, futures.ProcessPoolExecutor):
+            serializer = self.metadata["serializer"]
+            return _chain_future(
+                executor.submit(
+                    _submit_to_worker_broker,
+                    identifier,
+                    serializer.dumps((args, kwds))),
+                serializer.loads)
+        return executor.submit(self._submit_task, identifier, args, kwds)
+
+    async def asubmit(self, identifier, /, *args, **kwds):
+        return await asyncio.wrap_future(self.submit(identifier, *args, **kwds))
+
+    def schedule(self, task_caller, /, *, at=None, every=None):
+        if at is None and every is None:
+            raise ValueError("Expected a time 'at' or an interval 'every'.")
+
+        if isinstance(every, datetime.timedelta):
+            every = every.total_seconds()
+        if every is not None and every <= 0:
+            raise ValueError("Interval 'every' must be positive.")
+        if isinstance(at, datetime.datetime):
+            at = at.timestamp()
+
+        # Due times are kept on the monotonic
+        # clock so wall clock changes do not
+        # disturb the schedule.
+        if at is None:
+            due = time.monotonic() + every
+        else:
+            due = time.monotonic() + (at - time.time())
+
+        iden, args, kwds = _parse_task_call(task_caller)
+        _, ((args, kwds),) = self._resolve_calls(iden, [(args, kwds)], False)
+        call = SimpleScheduledCall(iden, args, kwds, every)
+        with self._schedule_cond:
+            heapq.heappush(self._schedule, (due, next(self._schedule_seq), call))
+            if not (self._scheduler and self._scheduler.is_alive()):
+                self._scheduler = threading.Thread(
+                    target=self._run_schedule,
+                    name="tasxnat-scheduler",
+                    daemon=True)
+                self._scheduler.start()
+            self._schedule_cond.notify()
+        return call
+
+    def _run_schedule(self):
+        """
+        Dispatches scheduled calls as they come
+        due. Sleeps until the earliest one.
+        """
+
+        this_thread = threading.current_thread()
+        with self._schedule_cond:
+            while self._scheduler is this_thread:
+                if not self._schedule:
+                    self._schedule_cond.wait()
+                    continue
+
+                due, _, call = self._schedule[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._schedule_cond.wait(delay)
+                    continue
+
+                heapq.heappop(self._schedule)
+                if call.is_cancelled:
+                    continue
+
+                # A failed dispatch fails this run
+                # only. Later runs and other calls
+                # are still dispatched.
+                try:
+                    call._future = self.submit(
+                        call.identifier,
+                        *call._args,
+                        **call._kwds)
+                    call._error = None
+                except Exception as error:
+                    call._error = error
+                    call._future = futures.Future()
+                    call._future.set_exception(error)
+
+                # Periodic calls keep their phase
+                # unless they fall a whole period
+                # behind.
+                if call.every:
+                    due = max(due + call.every, time.monotonic())
+                    heapq.heappush(
+                        self._schedule,
+                        (due, next(self._schedule_seq), call))
+
+    def shutdown(self, wait=True):
+        with self._schedule_cond:
+            scheduler, self._scheduler = self._scheduler, None
+            self._schedule.clear()
+            self._schedule_cond.notify()
+        if scheduler and wait:
+            scheduler.join()
+
+        with self._executor_lock:
+            if self._executor:
+                self._executor.shutdown(wait)
+            for lane in self._lanes:
+                lane.shutdown(wait)
+            self._executor = None
+            self._lanes = []
+        self._thread_pools.shutdown(wait)
+
+    def _get_executor(self) -> futures.Executor:
+        if self._executor:
+            return self._executor
+
+        with self._executor_lock:
+            if not self._executor:
+                self._executor = self._new_executor(
+                    self.metadata["executor_workers"])
+
+        return self._executor
+
+    def _get_lanes(self) -> list[futures.Executor]:
+        """
+        Single worker executors used for calls
+        with a routing key. A key always maps to
+        the same lane, and so the same worker
+        until it is recycled.
+        """
+
+        if self._lanes:
+            return self._lanes
+
+        with self._executor_lock:
+            if not self._lanes:
+                workers = self.metadata["executor_workers"]
+                if not workers and self.metadata["executor_mode"] == "process":
+                    workers = mp.cpu_count()
+                elif not workers:
+                    workers = min(32, mp.cpu_count() + 4)
+                self._lanes = [self._new_executor(1) for _ in range(workers)]
+
+        return self._lanes
+
+    def _new_executor(self, workers: int | None) -> futures.Executor:
+        if self.metadata["executor_mode"] == "process":
+            # Recycling workers cannot use fork.
+            # Leave the default to the executor.
+            max_tasks = self.metadata["max_tasks_per_worker"]
+            options: dict[str, typing.Any] = {}
+            if max_tasks:
+                options["max_tasks_per_child"] = max_tasks
+            if self.metadata["start_method"] or not max_tasks:
+                options["mp_context"] = self._get_mp_context()
+            return futures.ProcessPoolExecutor(
+                workers,
+                initializer=_init_worker_broker,
+                initargs=(self,),
+                **options)
+        return _LoopThreadPoolExecutor(workers, "tasxnat")
+
+    def _get_mp_context(self) -> typing.Any:
+        start_method = self.metadata["start_method"]
+        context = mp.get_context(start_method)
+
+        # The fork server imports task modules
+        # once. Workers forked from it share them
+        # copy-on-write. Only takes effect before
+        # the server first starts, and only for
+        # modules on the import path it starts
+        # with.
+        if start_method == "forkserver":
+            context.set_forkserver_preload(self._get_task_modules())
+        return context
+
+    def _get_task_modules(self) -> list[str]:
+        modules = {"tasxnat"}
+        for iden in [*self.__register__, *self.__lazy_register__]:
+            module = iden.partition(":")[0]
+            if module != "__main__":
+                modules.add(module)
+        return sorted(modules)
+
+    def _submit_task(self, iden: str, args: tuple, kwds: dict):
+        context = self._get_task(iden).invoke(*args, **kwds)
+        if not context.is_success:
+            raise context.failure[1] #type: ignore[misc]
+        return context.result
+
+    def _process_tasks_auto(
+            self,
+            iden: str,
+            calls: typing.Iterable[tuple[tuple, dict]],
+            is_coerced: bool,
+            process_count: int | None,
+            cancel_event: threading.Event):
+
+        strict_mode = self.metadata["strict_mode"]
+        root_task, calls = self._resolve_calls(iden, calls, is_coerced)
+        calls = list(calls)
+
+        # Parallel tasks are known to be CPU-bound
+        # and skip profiling.
+        if self.__executors__.get(iden) == "parallel":
+            self.__routes__.setdefault(iden, _parallel_engine())
+
+        # Profile the first calls of a task before
+        # choosing where the rest will run.
+        # Threaded tasks are profiled in a thread
+        # pool, which takes their thread requests.
+        # Their CPU time is counted process-wide.
+        is_threaded = root_task.thread_count > 1
+        cpu_time = time.process_time if is_threaded else time.thread_time
+        profile = self.__profiles__.setdefault(iden, [])
+        while iden not in self.__routes__:
+            if root_task.is_async or len(profile) >= _AUTO_PROFILE_CALLS:
+                self.__routes__[iden] = _choose_engine(
+                    profile,
+                    root_task.is_async,
+                    process_count,
+                    is_threaded)
+                break
+            if not calls:
+                return
+
+            cpu_t, wall_t = cpu_time(), time.perf_counter()
+            if is_threaded:
+                _process_tasks_multi(
+                    root_task,
+                    [calls.pop(0)],
+                    strict_mode,
+                    cancel_event,
+                    max_tasks=self.metadata["max_tasks_per_worker"],
+                    pools=self._thread_pools,
+                    latencies=self.__latencies__,
+                    scalers=self.__scalers__)
+            else:
+                _process_tasks(root_task, [calls.pop(0)], strict_mode, cancel_event)
+            profile.append(
+                (cpu_time() - cpu_t, time.perf_counter() - wall_t))
+
+        route = self.__routes__[iden]
+        if route == "loop":
+            _process_tasks_async(
+                root_task,
+                calls,
+                strict_mode,
+                cancel_event,
+                max(root_task.thread_count, _AUTO_THREAD_COUNT))
+        elif route == "thread":
+            _process_tasks_multi(
+                root_task,
+                calls,
+                strict_mode,
+                cancel_event,
+                max(root_task.thread_count, _AUTO_THREAD_COUNT),
+                self.metadata["max_tasks_per_worker"],
+                self._thread_pools,
+                self.__latencies__,
+                self.__scalers__)
+        elif route == "free_thread":
+            _process_tasks_multi(
+                root_task,
+                calls,
+                strict_mode,
+                cancel_event,
+                process_count or mp.cpu_count(),
+                self.metadata["max_tasks_per_worker"],
+                self._thread_pools,
+                self.__latencies__,
+                self.__scalers__)
+        elif route == "interpreter" and calls:
+            self._process_tasks_interpreters(
+                iden,
+                calls,
+                process_count or mp.cpu_count())
+        elif route == "process" and calls:
+            # Routed calls are partitioned by the
+            # pool, so a key's calls stay together.
+            process_count = process_count or mp.cpu_count()
+            if root_task.route_key:
+                call_maps = [(iden, calls)]
+            else:
+                call_maps = [
+                    (iden, calls[n::process_count])
+                    for n in range(process_count)]
+            self._process_tasks_pool(call_maps, {iden}, process_count)
+        else:
+            _process_tasks(root_task, calls, strict_mode, cancel_event)
 
-        with mp.Pool(process_count) as p:
-            result = p.starmap_async(self._process_tasks, task_call_maps)
-            result.get(self._pool_max_timeout)
+    def _process_tasks_interpreters(
+            self,
+            iden: str,
+            calls: list[tuple[tuple, dict]],
+            worker_count: int):
+        """
+        Runs calls across subinterpreters, each
+        with its own GIL. Interpreters import the
+        task themselves, as worker processes do.
+        """
+
+        # Only module level callables and plain
+        # data can be shared with interpreters.
+        # The broker is installed once in each.
+        # Calls sharing a routing key run in order
+        # in one interpreter.
+        route_key = self._get_route_key(iden)
+        if route_key:
+            lanes = _partition_calls(route_key, calls, worker_count)
+        else:
+            lanes = [calls[n::worker_count] for n in range(worker_count)]
+
+        serializer = self.metadata["serializer"]
+        executor_class = getattr(futures, "InterpreterPoolExecutor")
+        with executor_class(
+                worker_count,
+                initializer=_init_worker_broker,
+                initargs=(self,)) as executor:
+            jobs = [
+                executor.submit(
+                    _run_worker_job,
+                    iden,
+                    serializer.dumps(lane),
+                    True)
+                for lane in lanes if lane]
+            for job in futures.as_completed(jobs):
+                _, imports = serializer.loads(job.result())
+                self._merge_import_report(imports)
+
+    def _merge_import_report(self, imports: dict[str, float]):
+        """
+        Records imports made by workers. Each task
+        keeps its slowest import.
+        """
+
+        for iden, elapsed in imports.items():
+            self.__import_report__[iden] = max(
+                elapsed,
+                self.__import_report__.get(iden, 0.0))
 
     def _process_tasks(
             self,
             iden: str,
-            calls: typing.Iterable[tuple[tuple, dict]]):
+            calls: typing.Iterable[tuple[tuple, dict]],
+            is_coerced: bool,
+            cancel_event: typing.Any = None):
 
         strict_mode = self.metadata["strict_mode"]
-        root_task = self.__register__[iden]
+        cancel_event = cancel_event or _WORKER_CANCEL_EVENT
+        if cancel_event and cancel_event.is_set():
+            return
 
-        if root_task.thread_count <= 1:
-            _process_tasks(root_task, calls, strict_mode)
-        else:
-            _process_tasks_multi(root_task, calls, strict_mode)
+        root_task, calls = self._resolve_calls(iden, calls, is_coerced)
+
+        tracer = self.metadata["tracer"]
+        with _span(tracer, "run", task=iden, threads=root_task.thread_count):
+            if root_task.thread_count <= 1:
+                _process_tasks(root_task, calls, strict_mode, cancel_event)
+            else:
+                _process_tasks_multi(
+                    root_task,
+                    calls,
+                    strict_mode,
+                    cancel_event,
+                    max_tasks=self.metadata["max_tasks_per_worker"],
+                    pools=self._thread_pools,
+                    latencies=self.__latencies__,
+                    scalers=self.__scalers__)
 
     @typing.overload
     def __init__(self, /):
@@ -347,18 +1527,93 @@ class SimpleTaskBroker(TaskBroker):
                  *,
                  strict_mode: typing.Optional[bool] = None,
                  task_class: typing.Optional[type[Taskable]] = None,
-                 pool_factory: typing.Optional[type[pool.Pool]] = None):
+                 pool_factory: typing.Optional[type[pool.Pool]] = None,
+                 executor_mode: typing.Optional[
+                     typing.Literal["thread", "process"]] = None,
+                 executor_workers: typing.Optional[int] = None,
+                 serializer: typing.Optional[Serializer] = None,
+                 start_method: typing.Optional[
+                     typing.Literal["fork", "spawn", "forkserver"]] = None,
+                 max_tasks_per_worker: typing.Optional[int] = None,
+                 max_worker_memory: typing.Optional[int] = None,
+                 tracer: typing.Optional[Tracer] = None):
         ...
 
     def __init__(self,
                  *,
                  strict_mode: typing.Optional[bool] = None,
                  task_class: typing.Optional[type[Taskable]] = None,
-                 pool_factory: typing.Optional[_PoolFactory] = None):
+                 pool_factory: typing.Optional[_PoolFactory] = None,
+                 executor_mode: typing.Optional[
+                     typing.Literal["thread", "process"]] = None,
+                 executor_workers: typing.Optional[int] = None,
+                 serializer: typing.Optional[Serializer] = None,
+                 start_method: typing.Optional[
+                     typing.Literal["fork", "spawn", "forkserver"]] = None,
+                 max_tasks_per_worker: typing.Optional[int] = None,
+                 max_worker_memory: typing.Optional[int] = None,
+                 tracer: typing.Optional[Tracer] = None):
+        # Process executors cannot recycle forked
+        # workers. Batch pools can.
+        if executor_mode == "process" and start_method == "fork" and max_tasks_per_worker:
+            raise ValueError(
+                "max_tasks_per_worker cannot be used with the 'fork' start "
+                "method in 'process' executor mode.")
+
         self.__metadata__ = (
             {
                 "strict_mode": strict_mode or False,
-                "task_class": task_class or SimpleTaskable
+                "task_class": task_class or SimpleTaskable,
+                "executor_mode": executor_mode or "thread",
+                "executor_workers": executor_workers,
+                "serializer": serializer or PickleSerializer(),
+                "start_method": start_method,
+                "max_tasks_per_worker": max_tasks_per_worker,
+                "max_worker_memory": max_worker_memory,
+                "tracer": tracer
             })
         self.__register__ = {}
+        self.__lazy_register__ = {}
+        self.__import_report__ = {}
+        self.__executors__ = {}
+        self.__profiles__ = {}
+        self.__routes__ = {}
+        self.__latencies__ = {}
+        self.__scalers__ = {}
+        self.__ipc_report__ = None
+        self.__coercers__ = {}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._lanes = []
         self._pool_factory = pool_factory or mp.Pool
+        self._schedule = []
+        self._schedule_cond = threading.Condition()
+        self._schedule_seq = itertools.count()
+        self._scheduler = None
+
+        # Worker threads of threaded tasks live
+        # across batches, until shutdown.
+        self._thread_pools = _ThreadPools()
+        weakref.finalize(self, self._thread_pools.shutdown)
+
+    def __getstate__(self):
+        # Executors and locks cannot cross the
+        # process boundary.
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        state["_lanes"] = []
+        state["_schedule"] = []
+        state["_scheduler"] = None
+        # Converters are compiled again in the
+        # worker for tasks it imports itself.
+        state["__coercers__"] = {}
+        del state["_executor_lock"]
+        del state["_schedule_cond"]
+        del state["_schedule_seq"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
+        self._schedule_cond = threading.Condition()
+        self._schedule_seq = itertools.count()
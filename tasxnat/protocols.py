@@ -1,22 +1,27 @@
-import abc, typing
+import abc, contextlib, datetime, inspect, typing
 from collections import deque
-from concurrent.futures import ThreadPoolExecutor
+from concurrent import futures
 from multiprocessing import pool
 
 __all__ = (
     (
         "_PoolFactory",
         "_TCStack",
+        "ScheduledCall",
+        "Serializer",
+        "TaskContext",
+        "TaskCoordinator",
         "TaskedCallable",
         "TaskBroker",
-        "Taskable"
+        "Taskable",
+        "Tracer"
     ))
 
 _Ps = typing.ParamSpec("_Ps")
 _RT = typing.TypeVar("_RT")
 _RT_co = typing.TypeVar("_RT_co", covariant=True)
 _PoolFactory = type[pool.Pool] | typing.Callable[[], pool.Pool]
-_TCStackCallable = typing.Callable[["TaskedCallable"], None]
+_TCStackCallable = typing.Callable[["TaskContext"], None]
 _TaskableCallable = typing.Callable[typing.Concatenate["Taskable", _Ps], _RT]
 
 
@@ -39,32 +44,205 @@ class _TCStack(typing.Sequence[_TCStackCallable]):
 
 
 @typing.runtime_checkable
-class TaskedCallable(typing.Protocol[_Ps, _RT_co]):
+class Serializer(typing.Protocol):
     """
-    Callable object that is registered to some
-    `TaskBroker` object.
+    Converts objects to and from bytes when they
+    cross a process boundary.
+    """
+
+    __slots__ = ()
+
+    @property
+    @abc.abstractmethod
+    def name(self) -> str:
+        """Name of this serialization format."""
+
+    @abc.abstractmethod
+    def dumps(self, obj: typing.Any) -> bytes:
+        """Serialize an object to bytes."""
+
+    @abc.abstractmethod
+    def loads(self, data: bytes | memoryview) -> typing.Any:
+        """Deserialize an object from bytes."""
+
+
+class ScheduledCall(typing.Protocol):
+    """
+    A task call scheduled on some `TaskBroker`
+    to run later or on an interval.
+    """
+
+    __slots__ = ()
+
+    @property
+    @abc.abstractmethod
+    def identifier(self) -> str:
+        """Identifier of the scheduled task."""
+
+    @property
+    @abc.abstractmethod
+    def every(self) -> float | None:
+        """Seconds between runs, if periodic."""
+
+    @property
+    @abc.abstractmethod
+    def future(self) -> futures.Future | None:
+        """Future of the latest run."""
+
+    @property
+    @abc.abstractmethod
+    def error(self) -> BaseException | None:
+        """
+        Error raised dispatching the latest run,
+        if any. The run's future fails with it.
+        """
+
+    @property
+    @abc.abstractmethod
+    def is_cancelled(self) -> bool:
+        """Whether this call was cancelled."""
+
+    @abc.abstractmethod
+    def cancel(self) -> None:
+        """Stops any further runs of this call."""
+
+
+class Tracer(typing.Protocol):
+    """
+    Records timed spans of work. Spans nest
+    under the span open on the current thread
+    unless given a parent.
+    """
+
+    __slots__ = ()
+
+    @property
+    @abc.abstractmethod
+    def sample_rate(self) -> float:
+        """Fraction of task calls traced."""
+
+    @abc.abstractmethod
+    def sample(self) -> bool:
+        """Whether to trace the next call."""
+
+    @abc.abstractmethod
+    def current(self) -> str | None:
+        """Id of the span open on this thread."""
+
+    @abc.abstractmethod
+    def span(
+            self,
+            name: str,
+            *,
+            parent: str | None = None,
+            **attrs: typing.Any) -> contextlib.AbstractContextManager[str]:
+        """
+        Times the enclosed block as a span.
+        Yields the id of the span.
+        """
+
+    @abc.abstractmethod
+    def record(
+            self,
+            name: str,
+            start_ns: int,
+            end_ns: int,
+            *,
+            parent: str | None = None,
+            **attrs: typing.Any) -> None:
+        """
+        Records a span which has already ended.
+        Times are from `time.time_ns`.
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Releases the trace output."""
+
+
+@typing.runtime_checkable
+class TaskContext(typing.Protocol):
     """
+    State of a single call made to some
+    `TaskedCallable`. Passed to the *before* and
+    *after* call stacks so concurrent calls do
+    not share state.
+    """
+
+    __slots__ = ()
 
     @property
     @abc.abstractmethod
-    def args(self) -> typing.ParamSpecArgs:
-        """VarArgs passed into this callable."""
+    def args(self) -> tuple:
+        """VarArgs passed into this call."""
 
     @args.setter
     @abc.abstractmethod
-    def args(self, *args: typing.ParamSpecArgs):
+    def args(self, args: tuple):
         """
         Set the VarArgs passed into this
-        callable.
+        call.
         """
 
     @property
     @abc.abstractmethod
-    def kwds(self) -> typing.ParamSpecKwargs:
+    def kwds(self) -> dict:
         """
         Keyword VarArgs passed into this
-        callable.
+        call.
+        """
+
+    @property
+    @abc.abstractmethod
+    def taskable(self) -> "Taskable":
+        """The `Taskable` being called."""
+
+    @property
+    @abc.abstractmethod
+    def result(self) -> typing.Any:
+        """Return value of this call."""
+
+    @property
+    @abc.abstractmethod
+    def failure(self) -> tuple[str | None, Exception | None]:
+        """Failure details."""
+
+    @property
+    @abc.abstractmethod
+    def is_success(self) -> bool:
+        """
+        Whether this call completed
+        successfully.
+        """
+
+    @abc.abstractmethod
+    def request_new_thread(
+        self,
+        fn: typing.Callable,
+        callargs: tuple[tuple, dict],
+        *,
+        timeout: int | float | None):
         """
+        Attempt to run some process in the
+        thread pool running this call. If
+        successful, the call will be sent to the
+        queue of its batch.
+
+        Throws an error if the `Taskable` is not
+        meant to be run in multi-threaded mode,
+        or this call was not run in a thread
+        pool.
+        """
+
+
+@typing.runtime_checkable
+class TaskedCallable(typing.Protocol[_Ps, _RT_co]):
+    """
+    Callable object that is registered to some
+    `TaskBroker` object.
+    """
+
+    __slots__ = ()
 
     @property
     def is_async(self) -> bool:
@@ -79,18 +257,32 @@ class TaskedCallable(typing.Protocol[_Ps, _RT_co]):
         """The parent taskable object."""
 
     @abc.abstractmethod
-    def push_before(self, fn: _TCStackCallable) -> None:
+    def push_before(
+            self,
+            fn: _TCStackCallable,
+            *,
+            independent: bool = False) -> None:
         """
         Push some callable object onto the
         `before task` call stack.
+
+        :independent: async tasks run neighbouring
+        independent callables concurrently.
         """
 
     @abc.abstractmethod
-    def push_after(self, fn: _TCStackCallable) -> None:
+    def push_after(
+            self,
+            fn: _TCStackCallable,
+            *,
+            independent: bool = False) -> None:
         """
         Push some callable object onto the
         `after task` call stack.
 
+        :independent: async tasks run neighbouring
+        independent callables concurrently.
+
         Note: *after task* callables must return
         the expected return value of this tasks
         return value.
@@ -110,14 +302,22 @@ class TaskedCallable(typing.Protocol[_Ps, _RT_co]):
         """
 
     @abc.abstractmethod
-    def __before__(self) -> None:
+    def invoke(self, context: TaskContext) -> _RT_co:
+        """
+        Calls this task using the callargs of
+        the given context. Safe to use from
+        several threads at once.
+        """
+
+    @abc.abstractmethod
+    def __before__(self, context: TaskContext) -> None:
         """
         Runs the assigned stack of procedures
         *before* calling this task.
         """
 
     @abc.abstractmethod
-    def __after__(self) -> None:
+    def __after__(self, context: TaskContext) -> None:
         """
         Runs the assigned stack of procedures
         *after* calling this task.
@@ -130,6 +330,8 @@ class Taskable(typing.Protocol):
     Handles some task defined by this class.
     """
 
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def identifier(self) -> str:
@@ -153,6 +355,58 @@ class Taskable(typing.Protocol):
         run in at one time.
         """
 
+    @property
+    @abc.abstractmethod
+    def min_thread_count(self) -> int:
+        """
+        Fewest threads this task runs in at one
+        time. When lower than `thread_count`,
+        concurrency is scaled between the two
+        based on observed throughput.
+        """
+
+    @property
+    @abc.abstractmethod
+    def route_key(self) -> typing.Callable[..., typing.Hashable] | None:
+        """
+        Callable taking the callargs of a call
+        and returning its routing key. Calls
+        sharing a key run in order on the same
+        worker process and thread. Submitted
+        calls keep their worker between calls,
+        while calls of a batch only share one
+        within that batch. Must be defined at
+        module level.
+        """
+
+    @property
+    @abc.abstractmethod
+    def signature(self) -> inspect.Signature | None:
+        """
+        Signature of this task's callable without
+        the leading `Taskable` parameter.
+        """
+
+    @property
+    @abc.abstractmethod
+    def hedge_percentile(self) -> float | None:
+        """
+        Latency percentile of this task past
+        which a running call is duplicated onto
+        an idle thread. The first copy to finish
+        is kept. Only for idempotent tasks.
+        """
+
+    @property
+    @abc.abstractmethod
+    def resource(self) -> typing.Any:
+        """
+        Resource made by this task's `setup`
+        callable. Created once per worker thread
+        and process on first access and passed
+        to `teardown` when the worker exits.
+        """
+
     @property
     @abc.abstractmethod
     def is_async(self) -> bool:
@@ -183,6 +437,24 @@ class Taskable(typing.Protocol):
         passed.
         """
 
+    @abc.abstractmethod
+    def invoke(self, *args, **kwds) -> TaskContext:
+        """
+        Executes this task with the arguments
+        passed. Unlike `handle`, results are
+        kept in the returned context rather
+        than on this `Taskable`, making it safe
+        to share between threads.
+        """
+
+    @abc.abstractmethod
+    async def ainvoke(self, *args, **kwds) -> TaskContext:
+        """
+        Awaitable variant of `invoke`. Async
+        tasks are awaited on the running event
+        loop.
+        """
+
     @classmethod
     @abc.abstractmethod
     def from_callable(
@@ -191,21 +463,15 @@ class Taskable(typing.Protocol):
         fn: typing.Callable,
         thread_count: typing.Optional[int],
         is_strict: typing.Optional[bool],
-        is_async: typing.Optional[bool]) -> typing.Self:
+        is_async: typing.Optional[bool],
+        **options: typing.Any) -> typing.Self:
         """
         Create a `Taskable` from a callable
         object.
-        """
 
-    @abc.abstractmethod
-    def set_thread_pool(self, pool: ThreadPoolExecutor, queue: TaskQueue):
-        """
-        Sets the thread pool object to be used
-        in multi-threaded mode. This method is
-        intended for internal use only.
-
-        Throws an error if this `Taskable` is not
-        meant to be run in multi-threaded mode.
+        :options: additional keyword options
+        specific to the `Taskable`
+        implementation.
         """
 
     @abc.abstractmethod
@@ -217,11 +483,11 @@ class Taskable(typing.Protocol):
         timeout: int | float | None):
         """
         Attempt to run some process in the
-        attached thread pool. If successful, the
-        call will be sent to the queue.
+        thread pool of the call in progress. See
+        `TaskContext.request_new_thread`.
 
-        Throws an error if this `Taskable` is not
-        meant to be run in multi-threaded mode.
+        Throws an error if not called during a
+        call to this `Taskable`.
         """
 
 
@@ -238,6 +504,33 @@ class TaskBroker(typing.Protocol):
     def metadata(self) -> typing.Mapping[str, str]:
         """Task metadata."""
 
+    @property
+    @abc.abstractmethod
+    def import_report(self) -> typing.Mapping[str, float]:
+        """
+        Seconds spent importing each lazily
+        registered task, in this process or the
+        workers of its batches. Tasks imported
+        more than once report the slowest import.
+        """
+
+    @property
+    @abc.abstractmethod
+    def ipc_report(self) -> typing.Mapping[str, typing.Any]:
+        """
+        Bytes transferred to and from worker
+        processes and time spent serializing
+        during the last batch sent to them.
+        """
+
+    @property
+    @abc.abstractmethod
+    def routes(self) -> typing.Mapping[str, str]:
+        """
+        Engine chosen for each task using
+        automatic engine selection.
+        """
+
     @typing.overload
     @abc.abstractmethod
     def task(self, fn: typing.Callable, /) -> TaskedCallable:
@@ -252,7 +545,9 @@ class TaskBroker(typing.Protocol):
         klass: typing.Optional[type[Taskable]],
         thread_count: typing.Optional[int],
         is_strict: typing.Optional[bool],
-        is_async: typing.Optional[bool]
+        is_async: typing.Optional[bool],
+        executor: typing.Optional[typing.Literal["auto", "parallel"]],
+        **options: typing.Any
         ) -> typing.Callable[[], TaskedCallable]:
         ...
 
@@ -265,10 +560,43 @@ class TaskBroker(typing.Protocol):
         thread_count: typing.Optional[int] = None,
         is_strict: typing.Optional[bool] = None,
         is_async: typing.Optional[bool] = None,
+        executor: typing.Optional[typing.Literal["auto", "parallel"]] = None,
+        **options: typing.Any
         ) -> TaskedCallable | typing.Callable[[], TaskedCallable]: 
         """
         Creates and registers a `Taskable`
-        object.
+        object. Additional options are passed
+        to `Taskable.from_callable`.
+
+        :executor: `"auto"` profiles the first
+        calls of this task and runs the rest
+        inline, in threads, in processes or on
+        an event loop, whichever is cheapest.
+        `"parallel"` runs CPU-bound tasks on
+        free threads or subinterpreters where the
+        runtime supports them, in processes
+        otherwise.
+        """
+
+    @abc.abstractmethod
+    def lazy_task(
+        self,
+        identifier: str,
+        /,
+        *,
+        klass: typing.Optional[type[Taskable]] = None,
+        thread_count: typing.Optional[int] = None,
+        is_strict: typing.Optional[bool] = None,
+        is_async: typing.Optional[bool] = None,
+        executor: typing.Optional[typing.Literal["auto", "parallel"]] = None,
+        **options: typing.Any) -> None:
+        """
+        Registers a task by its identifier
+        without importing it. The task is
+        imported on first use.
+
+        :identifier: string in the format of
+        `<import.path>:<task_name>`.
         """
 
     @typing.overload
@@ -276,7 +604,9 @@ class TaskBroker(typing.Protocol):
     def before(
         self,
         fn: _TCStackCallable,
-        /) -> typing.Callable[[], TaskedCallable]:
+        /,
+        *,
+        independent: bool = False) -> typing.Callable[[], TaskedCallable]:
         ...
 
     @typing.overload
@@ -285,7 +615,9 @@ class TaskBroker(typing.Protocol):
         self,
         fn1: TaskedCallable,
         fn2: _TCStackCallable,
-        /) -> TaskedCallable:
+        /,
+        *,
+        independent: bool = False) -> TaskedCallable:
         ...
 
     @typing.overload
@@ -294,7 +626,9 @@ class TaskBroker(typing.Protocol):
         self,
         fn1: TaskedCallable | _TCStackCallable,
         fn2: TaskedCallable | _TCStackCallable | None,
-        /) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
+        /,
+        *,
+        independent: bool = False) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
         ...
 
     @abc.abstractmethod
@@ -302,7 +636,9 @@ class TaskBroker(typing.Protocol):
         self,
         fn1: TaskedCallable | _TCStackCallable,
         fn2: TaskedCallable | _TCStackCallable | None = None,
-        /) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
+        /,
+        *,
+        independent: bool = False) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
         """
         Push the target callable on to the
         *before* stack of the given
@@ -313,7 +649,10 @@ class TaskBroker(typing.Protocol):
     @abc.abstractmethod
     def after(
         self,
-        fn: _TCStackCallable, /) -> typing.Callable[[], TaskedCallable]:
+        fn: _TCStackCallable,
+        /,
+        *,
+        independent: bool = False) -> typing.Callable[[], TaskedCallable]:
         ...
 
     @typing.overload
@@ -321,7 +660,10 @@ class TaskBroker(typing.Protocol):
     def after(
         self,
         fn1: TaskedCallable,
-        fn2: _TCStackCallable, /) -> TaskedCallable:
+        fn2: _TCStackCallable,
+        /,
+        *,
+        independent: bool = False) -> TaskedCallable:
         ...
 
     @typing.overload
@@ -330,7 +672,9 @@ class TaskBroker(typing.Protocol):
         self,
         fn1: TaskedCallable | _TCStackCallable,
         fn2: TaskedCallable | _TCStackCallable | None,
-        /) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
+        /,
+        *,
+        independent: bool = False) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
         ...
 
     @abc.abstractmethod
@@ -338,13 +682,81 @@ class TaskBroker(typing.Protocol):
         self,
         fn1: TaskedCallable | _TCStackCallable,
         fn2: TaskedCallable | _TCStackCallable | None = None,
-        /) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
+        /,
+        *,
+        independent: bool = False) -> TaskedCallable | typing.Callable[[], TaskedCallable]:
         """
         Push the target callable on to the
         *after* stack of the given
         `TaskedCallable`.
         """
 
+    @abc.abstractmethod
+    def submit(
+        self,
+        identifier: str,
+        /,
+        *args,
+        **kwds) -> futures.Future:
+        """
+        Dispatches a single call of the given
+        task to a persistent executor. The
+        returned future resolves to the task's
+        return value.
+
+        :identifier: string in the format of
+        `<import.path>:<task_name>`.
+        """
+
+    @abc.abstractmethod
+    async def asubmit(self, identifier: str, /, *args, **kwds) -> typing.Any:
+        """
+        Awaitable variant of `submit`.
+        """
+
+    @abc.abstractmethod
+    def schedule(
+            self,
+            task_caller: str,
+            /,
+            *,
+            at: float | datetime.datetime | None = None,
+            every: float | datetime.timedelta | None = None) -> ScheduledCall:
+        """
+        Schedules a task call to be dispatched
+        with `submit` at a given time, on an
+        interval, or both.
+
+        :task_caller: string in the format of
+        `<import.path>:<task_name>[<args>]`.
+        :at: UNIX timestamp or datetime of the
+        first run.
+        :every: seconds or timedelta between
+        runs.
+        """
+
+    @abc.abstractmethod
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shuts down the executor used by
+        `submit`, if one was started, and the
+        thread pools kept between batches.
+        Discards scheduled calls.
+        """
+
+    @abc.abstractmethod
+    def serve(self,
+              address: tuple[str, int],
+              *,
+              heartbeat_interval: float = 1.0) -> None:
+        """
+        Connects to a `TaskCoordinator` and runs
+        the calls it hands out until it stops.
+
+        :address: host and port of the
+        coordinator.
+        """
+
     @abc.abstractmethod
     def register_task(self, taskable: Taskable) -> None:
         """
@@ -352,6 +764,21 @@ class TaskBroker(typing.Protocol):
         task manager.
         """
 
+    @abc.abstractmethod
+    def resolve_calls(
+            self,
+            identifier: str,
+            calls: typing.Iterable[tuple[tuple, dict]]) -> tuple[Taskable, typing.Iterable[tuple[tuple, dict]]]:
+        """
+        Gets the `Taskable` of the given
+        identifier, importing it if lazy, and
+        converts the callargs of its calls
+        against its signature.
+
+        Throws an error if the task is unknown or
+        any call does not fit its signature.
+        """
+
     @typing.overload
     @abc.abstractmethod
     def process_tasks(self, /, *task_callers: str) -> None:
@@ -377,3 +804,40 @@ class TaskBroker(typing.Protocol):
         :task_callers: series of strings in the
         format of `<import.path>:<task_name>`.
         """
+
+
+class TaskCoordinator(typing.Protocol):
+    """
+    Owns parsed task calls and hands them out in
+    chunks to `TaskBroker` objects serving it
+    over TCP.
+    """
+
+    __slots__ = ()
+
+    @property
+    @abc.abstractmethod
+    def address(self) -> tuple[str, int]:
+        """Host and port brokers connect to."""
+
+    @abc.abstractmethod
+    def process_tasks(
+            self,
+            /,
+            *task_callers: str,
+            timeout: typing.Optional[float] = None) -> list[tuple[bool, typing.Any]]:
+        """
+        Executes given tasks on connected
+        brokers. Returns each call's success and
+        its result or exception, in call order.
+
+        :task_callers: series of strings in the
+        format of `<import.path>:<task_name>`.
+        """
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """
+        Stops connected brokers and closes the
+        listening socket.
+        """
@@ -0,0 +1,128 @@
+import marshal, pickle, struct, zlib
+import typing
+
+from tasxnat.protocols import Serializer
+
+__all__ = (
+    (
+        "PickleSerializer",
+        "MarshalSerializer",
+        "CompressedSerializer"
+    ))
+
+_FRAME_HEADER = struct.Struct("!I")
+
+
+class PickleSerializer(Serializer):
+    """
+    Pickles objects using protocol 5. Buffers
+    exposed out-of-band, such as `bytearray` or
+    `PickleBuffer` wrapped data, are framed after
+    the pickle stream instead of being serialized
+    into it. Each is copied once into the payload
+    and handed back to `pickle.loads` as a view
+    of the data it is read from.
+    """
+
+    __slots__ = ("_protocol",)
+
+    _protocol: int
+
+    @property
+    def name(self):
+        return f"pickle-{self._protocol}"
+
+    def dumps(self, obj):
+        buffers = list[pickle.PickleBuffer]()
+        if self._protocol >= 5:
+            data = pickle.dumps(
+                obj,
+                self._protocol,
+                buffer_callback=buffers.append)
+        else:
+            data = pickle.dumps(obj, self._protocol)
+
+        frames = [data, *(buffer.raw() for buffer in buffers)]
+        header = _FRAME_HEADER.pack(len(frames))
+        sizes  = b"".join(_FRAME_HEADER.pack(len(frame)) for frame in frames)
+        return b"".join([header, sizes, *frames])
+
+    def loads(self, data):
+        view = memoryview(data)
+        (count,) = _FRAME_HEADER.unpack_from(view)
+
+        offset = _FRAME_HEADER.size
+        sizes  = list[int]()
+        for _ in range(count):
+            sizes.append(_FRAME_HEADER.unpack_from(view, offset)[0])
+            offset += _FRAME_HEADER.size
+
+        frames = list[memoryview]()
+        for size in sizes:
+            frames.append(view[offset:offset + size])
+            offset += size
+
+        return pickle.loads(frames[0], buffers=frames[1:])
+
+    def __init__(self, protocol: int = 5):
+        self._protocol = protocol
+
+
+class MarshalSerializer(Serializer):
+    """
+    Serializes plain data (strings, numbers,
+    tuples, lists, dicts and sets) using
+    `marshal`. Faster than pickle, but cannot
+    serialize arbitrary objects.
+    """
+
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return "marshal"
+
+    def dumps(self, obj):
+        return marshal.dumps(obj)
+
+    def loads(self, data):
+        return marshal.loads(data)
+
+
+class CompressedSerializer(Serializer):
+    """
+    Compresses payloads of another serializer
+    using `zlib` once they reach a size
+    threshold. Trades CPU for IPC volume.
+    """
+
+    __slots__ = ("_serializer", "_level", "_threshold")
+
+    _serializer: Serializer
+    _level: int
+    _threshold: int
+
+    @property
+    def name(self):
+        return f"{self._serializer.name}+zlib"
+
+    def dumps(self, obj):
+        data = self._serializer.dumps(obj)
+        if len(data) < self._threshold:
+            return b"\0" + data
+        return b"\1" + zlib.compress(data, self._level)
+
+    def loads(self, data):
+        view = memoryview(data)
+        if view[0]:
+            return self._serializer.loads(zlib.decompress(view[1:]))
+        return self._serializer.loads(view[1:])
+
+    def __init__(self,
+                 serializer: typing.Optional[Serializer] = None,
+                 *,
+                 level: int = 1,
+                 threshold: int = 64 * 1024):
+        self._serializer = serializer or PickleSerializer()
+        self._level = level
+        self._threshold = threshold
@@ -0,0 +1,155 @@
+"""
+Span tracing. Spans are appended to a local
+file as they end, either as JSON lines or as
+Chrome trace events which load in Perfetto or
+`chrome://tracing`.
+
+Every process appends to the same file. Each
+span is a single write to a file opened in
+append mode, so lines from different
+processes do not interleave.
+"""
+
+import contextlib, itertools, json, os, random, threading, time
+import typing
+
+from tasxnat.protocols import Tracer
+from tasxnat.utilities import _span_stack
+
+__all__ = (("SimpleTracer",))
+
+
+class SimpleTracer(Tracer):
+    """
+    Writes spans to `path`. Calls are sampled at
+    `sample_rate` so tracing large batches stays
+    cheap; batch level spans are always kept.
+    """
+
+    __slots__ =\
+    (
+        "_fd",
+        "_format",
+        "_ids",
+        "_path",
+        "_pid",
+        "_sample_rate"
+    )
+
+    _fd: int | None
+    _format: typing.Literal["jsonl", "chrome"]
+    _ids: typing.Iterator[int]
+    _path: str
+    _pid: int
+    _sample_rate: float
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def sample_rate(self):
+        return self._sample_rate
+
+    def sample(self):
+        return self._sample_rate >= 1.0 or random.random() < self._sample_rate
+
+    def current(self):
+        stack = _span_stack()
+        return stack[-1] if stack else None
+
+    @contextlib.contextmanager
+    def span(self, name, *, parent=None, **attrs):
+        stack = _span_stack()
+        parent = parent or (stack[-1] if stack else None)
+        span_id = self._next_id()
+
+        start_ns = time.time_ns()
+        stack.append(span_id)
+        try:
+            yield span_id
+        finally:
+            stack.pop()
+            self._write(name, span_id, parent, start_ns, time.time_ns(), attrs)
+
+    def record(self, name, start_ns, end_ns, *, parent=None, **attrs):
+        parent = parent or self.current()
+        self._write(name, self._next_id(), parent, start_ns, end_ns, attrs)
+
+    def close(self):
+        if self._fd is not None and self._pid == os.getpid():
+            os.close(self._fd)
+        self._fd = None
+
+    def _next_id(self) -> str:
+        # Counters restart in forked workers, so
+        # ids are qualified by process.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._ids = itertools.count()
+            self._fd = None
+        return f"{self._pid:x}-{next(self._ids):x}"
+
+    def _write(self,
+               name: str,
+               span_id: str,
+               parent: str | None,
+               start_ns: int,
+               end_ns: int,
+               attrs: dict[str, typing.Any]):
+
+        if self._fd is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+
+        if self._format == "chrome":
+            event = (
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start_ns / 1e3,
+                    "dur": (end_ns - start_ns) / 1e3,
+                    "pid": self._pid,
+                    "tid": threading.get_native_id(),
+                    "args": {"id": span_id, "parent": parent, **attrs}
+                })
+            line = json.dumps(event, default=repr) + ",\n"
+        else:
+            event = (
+                {
+                    "name": name,
+                    "id": span_id,
+                    "parent": parent,
+                    "start_ns": start_ns,
+                    "duration_ns": end_ns - start_ns,
+                    "pid": self._pid,
+                    "tid": threading.get_native_id(),
+                    "attrs": attrs
+                })
+            line = json.dumps(event, default=repr) + "\n"
+        os.write(self._fd, line.encode())
+
+    def __getstate__(self):
+        return (self._path, self._format, self._sample_rate)
+
+    def __setstate__(self, state):
+        self._path, self._format, self._sample_rate = state
+        self._fd = None
+        self._pid = os.getpid()
+        self._ids = itertools.count()
+
+    def __init__(self,
+                 path: str | os.PathLike,
+                 *,
+                 format: typing.Literal["jsonl", "chrome"] = "jsonl",
+                 sample_rate: float = 1.0):
+        if format not in ("jsonl", "chrome"):
+            raise ValueError(f"Unknown trace format {format!r}.")
+
+        self.__setstate__((os.fspath(path), format, sample_rate))
+
+        # Chrome trace files are a JSON array
+        # which loaders accept unterminated.
+        with open(self._path, "w") as trace_file:
+            if format == "chrome":
+                trace_file.write("[\n")
@@ -1,5 +1,10 @@
-import asyncio, copy, inspect, re
+import asyncio, atexit, contextlib, contextvars, importlib, inspect, itertools, os, re, sys
+import threading
+import time, types, zlib
+import multiprocessing.util
+from multiprocessing import pool
 import typing
+from collections import deque
 from concurrent import futures
 from concurrent.futures import ThreadPoolExecutor
 
@@ -8,14 +13,65 @@ from tasxnat.protocols import Taskable, TaskQueue
 
 __all__ = (
     (
+        "_AUTO_THREAD_COUNT",
+        "_CALL_CONTEXT",
+        "_THREAD_QUEUE",
+        "_Coercer",
         "_parse_task_call",
+        "_compile_coercer",
         "_flatten_to_taskmaps",
+        "_import_task",
+        "_choose_engine",
+        "_parallel_engine",
+        "_route_index",
+        "_check_route_key",
+        "_partition_calls",
         "_handle_coroutine",
+        "_thread_resources",
+        "_span",
+        "_span_stack",
+        "_trace_subtask",
+        "_LoopThreadPoolExecutor",
+        "_RecyclingPool",
+        "_ThreadPools",
+        "_ThreadScaler",
+        "_RECYCLE_CHUNK",
         "_process_tasks",
+        "_process_tasks_async",
         "_process_tasks_multi"
     ))
 
 _RE_TASK_CALLER = re.compile(r"^[\w\.\:]+|\[.+\]$")
+_BOOL_STRINGS =\
+{
+    "true": True, "yes": True, "on": True, "1": True,
+    "false": False, "no": False, "off": False, "0": False
+}
+_Coercer = typing.Callable[[tuple, dict], tuple[tuple, dict]]
+_THREAD_LOCAL = threading.local()
+
+# Set for each call rather than on its task, so
+# concurrent batches of one task stay apart.
+_CALL_CONTEXT = contextvars.ContextVar[typing.Any]("_CALL_CONTEXT", default=None)
+_THREAD_QUEUE = contextvars.ContextVar[TaskQueue | None]("_THREAD_QUEUE", default=None)
+_NO_SPAN = contextlib.nullcontext()
+_THREAD_POLL_INTERVAL = 0.05
+
+# Speculative re-execution.
+_HEDGE_HISTORY = 256
+_HEDGE_MIN_SAMPLES = 16
+
+# Automatic engine selection.
+_AUTO_CPU_BOUND_RATIO = 0.5
+_AUTO_INLINE_THRESHOLD = 0.001
+_AUTO_THREAD_COUNT = 16
+
+# Worker recycling.
+_RECYCLE_CHUNK = 64
+
+# Async calls on worker thread loops.
+_LOOP_BATCH = 256
+_LOOP_CONCURRENCY = 64
 
 
 #NOTE: this is fairly lazy, let alone a 'dumb'
@@ -90,86 +146,958 @@ def _flatten_to_taskmaps(
     return [(iden, calls) for iden, calls in taskable_map.items()]
 
 
-def _handle_coroutine(
-        coro: typing.Coroutine,
-        multithread_mode: bool | None = None):
-    policy = asyncio.get_event_loop_policy()
+def _to_bool(value: str) -> bool:
     try:
-        loop = policy.get_event_loop()
+        return _BOOL_STRINGS[value.lower()]
+    except KeyError:
+        raise ValueError(f"invalid literal for bool(): {value!r}") from None
+
+
+def _converter_for(annotation: typing.Any) -> typing.Callable[[str], typing.Any] | None:
+    # Optional parameters convert as their
+    # inner type.
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        members = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(members) != 1:
+            return None
+        annotation = members[0]
+
+    if annotation is bool:
+        return _to_bool
+    if annotation in (int, float, complex):
+        return annotation
+    return None
+
+
+def _compile_coercer(iden: str, signature: inspect.Signature) -> _Coercer:
+    """
+    Compiles a converter from a task's signature.
+    Checks calls bind to the signature and
+    converts string arguments of `int`, `float`,
+    `complex` and `bool` parameters.
+    """
+
+    positional = list[tuple[str, typing.Callable | None]]()
+    keyword = dict[str, typing.Callable | None]()
+    var_positional: tuple[str, typing.Callable | None] = ("*args", None)
+    var_keyword = None
+
+    for param in signature.parameters.values():
+        convert = _converter_for(param.annotation)
+        if param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+            positional.append((param.name, convert))
+        if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY):
+            keyword[param.name] = convert
+        if param.kind == param.VAR_POSITIONAL:
+            var_positional = (param.name, convert)
+        if param.kind == param.VAR_KEYWORD:
+            var_keyword = convert
+
+    def convert_one(name: str, convert: typing.Callable | None, value: typing.Any):
+        if not convert or not isinstance(value, str):
+            return value
+        try:
+            return convert(value)
+        except ValueError as error:
+            raise ValueError(f"{iden}: cannot convert {name}={value!r}. {error}") from None
+
+    def coerce(args: tuple, kwds: dict) -> tuple[tuple, dict]:
+        try:
+            signature.bind(*args, **kwds)
+        except TypeError as error:
+            raise TypeError(f"{iden}: {error}") from None
+
+        params = itertools.chain(positional, itertools.repeat(var_positional))
+        args = tuple(
+            convert_one(name, convert, value)
+            for (name, convert), value in zip(params, args))
+        kwds = {
+            name: convert_one(name, keyword.get(name, var_keyword), value)
+            for name, value in kwds.items()}
+        return args, kwds
+
+    return coerce
+
+
+def _import_task(iden: str) -> tuple[typing.Callable, float]:
+    """
+    Imports the callable referenced by an
+    identifier in the format of
+    `<import.path>:<task_name>`. Returns the
+    callable and the seconds spent importing.
+    """
+
+    module_name, _, task_name = iden.partition(":")
+    if not (module_name and task_name):
+        raise ValueError(f"Invalid task identifier {iden!r}.")
+
+    start_t = time.perf_counter()
+    module  = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start_t
+
+    return getattr(module, task_name), elapsed
+
+
+def _parallel_engine() -> typing.Literal["free_thread", "interpreter", "process"]:
+    """
+    Picks the cheapest engine which runs
+    CPU-bound calls in parallel on this runtime.
+    Free-threaded builds run them on threads,
+    runtimes with an interpreter pool on
+    subinterpreters, and anything else in
+    processes.
+    """
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    if is_gil_enabled and not is_gil_enabled():
+        return "free_thread"
+    if hasattr(futures, "InterpreterPoolExecutor"):
+        return "interpreter"
+    return "process"
+
+
+def _choose_engine(
+        samples: typing.Sequence[tuple[float, float]],
+        is_async: bool,
+        process_count: int | None,
+        is_threaded: bool = False) -> typing.Literal[
+            "inline", "thread", "process", "loop", "free_thread", "interpreter"]:
+    """
+    Picks the cheapest engine for a task from
+    profiled `(cpu_time, wall_time)` samples of
+    its calls. Threaded tasks request threads
+    of their own, so only run where a thread
+    pool can take their requests.
+    """
+
+    serial = "thread" if is_threaded else "inline"
+    if is_async:
+        return "thread" if is_threaded else "loop"
+
+    cpu_t  = sum(cpu for cpu, _ in samples) / len(samples)
+    wall_t = sum(wall for _, wall in samples) / len(samples)
+
+    # Dispatch would cost more than the call.
+    if wall_t < _AUTO_INLINE_THRESHOLD:
+        return serial
+    if cpu_t / wall_t >= _AUTO_CPU_BOUND_RATIO:
+        # A single core cannot run calls in
+        # parallel.
+        if (process_count or os.cpu_count() or 1) > 1:
+            return _parallel_engine()
+        return serial
+    return "thread"
+
+
+def _route_index(key: typing.Any, count: int) -> int:
+    """
+    Maps a routing key to one of `count` lanes.
+    Stable across processes and runs, unlike
+    `hash`.
+    """
+
+    return zlib.crc32(repr(key).encode()) % count
+
+
+def _check_route_key(route_key: typing.Callable[..., typing.Any] | None):
+    """
+    Rejects routing keys worker processes could
+    not import, as the broker is pickled for
+    them along with its tasks.
+    """
+
+    qualname = getattr(route_key, "__qualname__", "")
+    if "<lambda>" in qualname or "<locals>" in qualname:
+        raise ValueError(
+            f"route_key must be defined at module level, got {route_key!r}")
+
+
+def _partition_calls(
+        route_key: typing.Callable[..., typing.Any],
+        calls: typing.Iterable[tuple[tuple, dict]],
+        count: int) -> list[list[tuple[tuple, dict]]]:
+    """
+    Splits calls into `count` lanes by routing
+    key. Calls keep their order within a lane.
+    """
+
+    lanes = [list[tuple[tuple, dict]]() for _ in range(count)]
+    for args, kwds in calls:
+        lanes[_route_index(route_key(*args, **kwds), count)].append((args, kwds))
+    return lanes
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the event loop owned by the current
+    thread, creating it on first use. Loops live
+    as long as their thread does.
+    """
+
+    # Loops inherited from a forked parent
+    # cannot be reused.
+    loop = getattr(_THREAD_LOCAL, "loop", None)
+    if loop and _THREAD_LOCAL.loop_pid != os.getpid():
+        loop = None
+
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _THREAD_LOCAL.loop = loop
+        _THREAD_LOCAL.loop_pid = os.getpid()
+
+        # Threads outside of a
+        # `_LoopThreadPoolExecutor` have no
+        # shutdown hook of their own.
+        if threading.current_thread() is threading.main_thread():
+            atexit.register(_close_event_loop, loop)
+
+    return loop
+
+
+def _span_stack() -> list[str]:
+    """
+    Ids of the spans open on the current
+    thread, innermost last.
+    """
+
+    spans = getattr(_THREAD_LOCAL, "spans", None)
+    if spans is None:
+        spans = _THREAD_LOCAL.spans = []
+    return spans
+
+
+def _span(tracer: typing.Any, name: str, **attrs) -> contextlib.AbstractContextManager:
+    # Tracing is off unless a tracer is given.
+    if tracer:
+        return tracer.span(name, **attrs)
+    return _NO_SPAN
+
+
+@contextlib.contextmanager
+def _adopt_span(span_id: str):
+    """
+    Nests spans opened on this thread under a
+    span opened on another.
+    """
+
+    stack = _span_stack()
+    stack.append(span_id)
+    try:
+        yield span_id
+    finally:
+        stack.pop()
+
+
+def _trace_subtask(tracer: typing.Any, fn: typing.Callable, iden: str) -> typing.Callable:
+    """
+    Wraps a thread request so it is traced as a
+    child of the requesting span, along with
+    the time it waited in the queue.
+    """
+
+    parent = tracer.current()
+    queued_ns = time.time_ns()
+
+    def record_queue():
+        tracer.record("queue", queued_ns, time.time_ns(), parent=parent, task=iden)
+
+    if inspect.iscoroutinefunction(fn):
+        async def traced_async(*args, **kwds):
+            record_queue()
+            with tracer.span("subtask", parent=parent, task=iden):
+                return await fn(*args, **kwds)
+        return traced_async
+
+    def traced(*args, **kwds):
+        record_queue()
+        with tracer.span("subtask", parent=parent, task=iden):
+            return fn(*args, **kwds)
+    return traced
+
+
+def _thread_resources() -> dict[str, tuple[typing.Any, typing.Callable | None]]:
+    """
+    Returns the task resources owned by the
+    current thread of this process. Maps task
+    identifiers to their resource and teardown
+    callable.
+    """
+
+    resources = getattr(_THREAD_LOCAL, "resources", None)
+    if resources is not None and _THREAD_LOCAL.resources_pid == os.getpid():
+        return resources
+
+    # Resources inherited from a forked parent
+    # belong to the parent.
+    resources = _THREAD_LOCAL.resources = {}
+    _THREAD_LOCAL.resources_pid = os.getpid()
+
+    # Threads outside of a
+    # `_LoopThreadPoolExecutor` have no shutdown
+    # hook of their own. Pool worker processes
+    # skip `atexit`, but run multiprocessing
+    # finalizers.
+    if threading.current_thread() is threading.main_thread():
+        atexit.register(_release_resources, resources)
+        multiprocessing.util.Finalize(
+            None,
+            _release_resources,
+            args=(resources,),
+            exitpriority=10)
+
+    return resources
+
+
+def _release_resources(
+        resources: dict[str, tuple[typing.Any, typing.Callable | None]]):
+    while resources:
+        _, (resource, teardown) = resources.popitem()
+        if teardown:
+            teardown(resource)
+
+
+def _close_event_loop(loop: asyncio.AbstractEventLoop):
+    if loop.is_closed():
+        return
+
+    # Pools may be released by a finalizer
+    # running under another thread's loop.
+    try:
+        asyncio.get_running_loop()
     except RuntimeError:
-        loop = policy.new_event_loop()
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    loop.close()
+
+
+def _handle_coroutine(coro: typing.Coroutine):
+    return _get_event_loop().run_until_complete(coro)
+
+
+class _LoopThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Thread pool where each worker thread owns a
+    long-lived event loop and task resources.
+    Both are released when the pool shuts down.
+    """
 
-    ret = loop.run_until_complete(coro)
-    if multithread_mode:
-        # Closing the loop after running the
-        # coroutine. Should prevent issues when
-        # loop.__del__ is called.
-        loop.close()
+    _loops: list[asyncio.AbstractEventLoop]
+    _loops_lock: threading.Lock
+    _resources: list[dict[str, tuple[typing.Any, typing.Callable | None]]]
 
-    return ret
+    def __init__(self,
+                 max_workers: int | None = None,
+                 thread_name_prefix: str = ""):
+        self._loops = []
+        self._loops_lock = threading.Lock()
+        self._resources = []
+        super().__init__(
+            max_workers,
+            thread_name_prefix,
+            initializer=self._init_thread)
+
+    def _init_thread(self):
+        loop = _get_event_loop()
+        resources = _thread_resources()
+        with self._loops_lock:
+            self._loops.append(loop)
+            self._resources.append(resources)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        super().shutdown(wait, cancel_futures=cancel_futures)
+
+        # Worker threads must be finished before
+        # their loops can be closed.
+        if not wait:
+            return
+        with self._loops_lock:
+            for resources in self._resources:
+                _release_resources(resources)
+            for loop in self._loops:
+                _close_event_loop(loop)
+            self._loops.clear()
+            self._resources.clear()
+
+
+class _ThreadPools:
+    """
+    Thread pools kept between batches, one per
+    task and size. Worker threads keep their
+    event loops and resources until the pools
+    are shut down.
+    """
+
+    _lock: threading.Lock
+    _pid: int
+    _pools: dict[tuple[str, int], _LoopThreadPoolExecutor]
+
+    def get(self, iden: str, thread_count: int) -> _LoopThreadPoolExecutor:
+        with self._lock:
+            # Pools inherited from a forked parent
+            # have no threads in this process.
+            if self._pid != os.getpid():
+                self._pid, self._pools = os.getpid(), {}
+
+            tpool = self._pools.get((iden, thread_count))
+            if not tpool:
+                tpool = _LoopThreadPoolExecutor(thread_count, iden)
+                self._pools[(iden, thread_count)] = tpool
+            return tpool
+
+    def discard(self, iden: str, thread_count: int, tpool: _LoopThreadPoolExecutor):
+        """
+        Stops handing out `tpool`. Another batch
+        may have already replaced it.
+        """
+
+        with self._lock:
+            if self._pools.get((iden, thread_count)) is tpool:
+                del self._pools[(iden, thread_count)]
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            tpools = list(self._pools.values()) if self._pid == os.getpid() else []
+            self._pools.clear()
+        for tpool in tpools:
+            tpool.shutdown(wait)
+
+    def __reduce__(self):
+        # Threads cannot cross the process
+        # boundary.
+        return (_ThreadPools, ())
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._pools = {}
+
+
+def _worker_memory() -> int:
+    """
+    Resident memory of this process in bytes.
+    Falls back to peak resident memory where
+    `/proc` is unavailable.
+    """
+
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _recycling_worker(
+        inqueue: typing.Any,
+        outqueue: typing.Any,
+        initializer: typing.Callable | None,
+        initargs: tuple,
+        maxtasks: int | None,
+        wrap_exception: bool,
+        max_memory: int | None):
+
+    get = inqueue.get
+    completed = 0
+
+    # Retiring before taking the next job means
+    # no job is lost. The pool replaces workers
+    # which exit.
+    def get_unless_retired():
+        nonlocal completed
+        if completed and max_memory and _worker_memory() > max_memory:
+            return None
+        completed += 1
+        return get()
+
+    inqueue.get = get_unless_retired
+    pool.worker( #type: ignore[attr-defined]
+        inqueue,
+        outqueue,
+        initializer,
+        initargs,
+        maxtasks,
+        wrap_exception)
+
+
+class _RecyclingPool(pool.Pool):
+    """
+    Process pool whose workers retire between
+    jobs once their resident memory passes
+    `max_memory` bytes.
+    """
+
+    _max_memory: int | None
+
+    def __init__(self,
+                 processes: int | None = None,
+                 initializer: typing.Callable | None = None,
+                 initargs: tuple = (),
+                 maxtasksperchild: int | None = None,
+                 *,
+                 max_memory: int | None = None,
+                 context: typing.Any = None):
+        self._max_memory = max_memory
+        super().__init__(
+            processes,
+            initializer,
+            initargs,
+            maxtasksperchild,
+            context)
+
+    def Process(self, ctx, *args, **kwds): #type: ignore[override]
+        kwds["target"] = _recycling_worker
+        kwds["args"] = (*kwds["args"], self._max_memory)
+        return ctx.Process(*args, **kwds)
+
+
+class _ThreadScaler:
+    """
+    Hill climbing concurrency controller. Each
+    window, steps the concurrency limit in the
+    direction that last improved throughput,
+    reversing when throughput drops or latency
+    grows without a throughput gain. Steps
+    double while the direction holds.
+    """
+
+    window: typing.ClassVar[float] = 0.1
+    tolerance: typing.ClassVar[float] = 0.05
+
+    limit: int
+    min_count: int
+    max_count: int
+
+    def __init__(self, min_count: int, max_count: int):
+        self.min_count = min_count
+        self.max_count = max_count
+        self.limit = min_count
+
+        self._direction = 1
+        self._step = 1
+        self._last_throughput: float | None = None
+        self._last_latency: float | None = None
+        self._reset(time.monotonic())
+
+    def resume(self, now: float | None = None):
+        """
+        Starts a new window, keeping the limit.
+        Time spent between batches is not
+        counted against throughput.
+        """
+
+        self._reset(now if now is not None else time.monotonic())
+
+    def record(self, latency: float):
+        self._completed += 1
+        self._latency_sum += latency
+
+    def adjust(self, queue_depth: int, now: float | None = None):
+        now = now if now is not None else time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.window or not self._completed:
+            return
+
+        throughput = self._completed / elapsed
+        latency = self._latency_sum / self._completed
+        direction = self._direction
+
+        # Not enough queued work to keep the
+        # current threads busy.
+        if queue_depth < self.limit:
+            self._direction = -1
+        elif self._last_throughput:
+            gain = (throughput - self._last_throughput) / self._last_throughput
+            if gain < -self.tolerance:
+                self._direction = -self._direction
+            elif gain < self.tolerance and latency > self._last_latency: #type: ignore[operator]
+                self._direction = -1
+
+        if self._direction == direction:
+            self._step = min(self._step * 2, self.max_count)
+        else:
+            self._step = 1
+        self.limit = max(
+            self.min_count,
+            min(self.max_count, self.limit + self._direction * self._step))
+
+        # Bounce off the bounds so the limit
+        # keeps probing for a better value.
+        if self.limit == self.min_count and queue_depth >= self.limit:
+            self._direction = 1
+        elif self.limit == self.max_count:
+            self._direction = -1
+
+        self._last_throughput = throughput
+        self._last_latency = latency
+        self._reset(now)
+
+    def _reset(self, now: float):
+        self._window_start = now
+        self._completed = 0
+        self._latency_sum = 0.0
+
+
+class _CancelEvent(typing.Protocol):
+    def is_set(self) -> bool:
+        ...
+
+    def set(self) -> None:
+        ...
 
 
 def _process_tasks(
         root_task: Taskable,
         calls: typing.Iterable[tuple[tuple, dict]],
-        strict_mode: bool):
+        strict_mode: bool,
+        cancel_event: _CancelEvent | None = None):
 
     for args, kwds in calls:
-        task = copy.deepcopy(root_task)
-        task.handle(*args, **kwds)
+        # Another strict task failed. Stop
+        # picking up new calls.
+        if cancel_event and cancel_event.is_set():
+            return
 
-        if task.is_success:
+        context = root_task.invoke(*args, **kwds)
+
+        if context.is_success:
             continue
 
         # Bail on first failure if strict mode.
-        if strict_mode and task.is_strict:
-            if task.failure[1]:
-                raise task.failure[1]
+        if strict_mode and root_task.is_strict:
+            if context.failure[1]:
+                if cancel_event:
+                    cancel_event.set()
+                raise context.failure[1]
+
+
+def _process_tasks_async(
+        root_task: Taskable,
+        calls: typing.Iterable[tuple[tuple, dict]],
+        strict_mode: bool,
+        cancel_event: _CancelEvent | None = None,
+        concurrency: int | None = None):
+    """
+    Runs calls concurrently on the event loop
+    owned by the current thread, at most
+    `concurrency` at once.
+    """
+
+    is_strict = strict_mode and root_task.is_strict
+
+    async def invoke(limit: typing.AsyncContextManager, args: tuple, kwds: dict):
+        async with limit:
+            if cancel_event and cancel_event.is_set():
+                return None
+
+            context = await root_task.ainvoke(*args, **kwds)
+            if is_strict and not context.is_success and cancel_event:
+                cancel_event.set()
+            return context
+
+    async def inner():
+        limit = (
+            asyncio.Semaphore(concurrency)
+            if concurrency else contextlib.nullcontext())
+        contexts = await asyncio.gather(
+            *[invoke(limit, args, kwds) for args, kwds in calls])
+
+        for context in contexts:
+            if not context or context.is_success:
+                continue
+
+            if is_strict:
+                if cancel_event:
+                    cancel_event.set()
+                raise context.failure[1] #type: ignore[misc]
+
+    if cancel_event and cancel_event.is_set():
+        return
+    _handle_coroutine(inner())
 
 
 def _process_tasks_multi(
         root_task: Taskable,
         calls: typing.Iterable[tuple[tuple, dict]],
-        strict_mode: bool):
-    # loop = asyncio.get_event_loop_policy().get_event_loop()
+        strict_mode: bool,
+        cancel_event: _CancelEvent | None = None,
+        thread_count: int | None = None,
+        max_tasks: int | None = None,
+        pools: _ThreadPools | None = None,
+        latencies: dict[str, deque[float]] | None = None,
+        scalers: dict[tuple[str, int], _ThreadScaler] | None = None):
 
+    cancel_event = cancel_event or threading.Event()
+
+    # The root task is shared by every thread.
+    # Call state lives in each call's context.
     def inner(*args, **kwds):
-        task = copy.deepcopy(root_task)
-        task.set_thread_pool(tpool, tqueue)
-        task.handle(*args, **kwds)
+        if cancel_event.is_set():
+            return
 
-        if task.is_success:
+        context = root_task.invoke(*args, **kwds)
+
+        if context.is_success:
             return
 
-        if strict_mode and task.is_strict:
-            _, err = task.failure
+        if strict_mode and root_task.is_strict:
+            _, err = context.failure
+            cancel_event.set()
             raise err #type: ignore[misc]
 
-    tpool  = ThreadPoolExecutor(root_task.thread_count, root_task.identifier)
-    tqueue = TaskQueue([(inner, c) for c in calls], root_task.thread_count) #type: ignore[misc]
+    # Async calls are handed to the loop of each
+    # thread in batches and run concurrently on
+    # it.
+    def inner_batch(batch):
+        _process_tasks_async(
+            root_task,
+            batch,
+            strict_mode,
+            cancel_event,
+            _LOOP_CONCURRENCY)
+
+    # Calls run on pool threads are traced under
+    # the span which started the pool.
+    parent_span = _span_stack()[-1] if _span_stack() else None
+    if parent_span:
+        untraced, untraced_batch = inner, inner_batch
+
+        def inner(*args, **kwds):
+            with _adopt_span(parent_span):
+                return untraced(*args, **kwds)
+
+        def inner_batch(batch):
+            with _adopt_span(parent_span):
+                return untraced_batch(batch)
+
+    # Scalers carry the concurrency they settled
+    # on over to later batches of the task.
+    thread_count = thread_count or root_task.thread_count
+    scaler = None
+    if root_task.min_thread_count < thread_count:
+        scaler = (scalers if scalers is not None else {}).setdefault(
+            (root_task.identifier, thread_count),
+            _ThreadScaler(root_task.min_thread_count, thread_count))
+        scaler.resume()
+
+    # Calls sharing a routing key run in order
+    # on the same thread.
+    def inner_lane(lane):
+        for args, kwds in lane:
+            inner(*args, **kwds)
+
+    # Calls are fed as threads free up. Only
+    # thread requests are bound to the queue's
+    # maxlen.
+    if root_task.route_key:
+        pending = deque(
+            (inner_lane, ((lane,), {}))
+            for lane in _partition_calls(root_task.route_key, calls, thread_count)
+            if lane)
+    elif root_task.is_async:
+        calls = list(calls)
+        size  = max(1, min(_LOOP_BATCH, -(-len(calls) // thread_count)))
+        pending = deque(
+            (inner_batch, ((calls[n:n + size],), {}))
+            for n in range(0, len(calls), size))
+    else:
+        pending = deque((inner, c) for c in calls)
+
+    # Batches without long-lived pools get a
+    # pool of their own.
+    owns_pools = pools is None
+    pools   = pools or _ThreadPools()
+    iden    = root_task.identifier
+    tpool   = pools.get(iden, thread_count)
+    tqueue  = TaskQueue((), thread_count)
+    retired = list[threading.Thread]()
+    tpool_calls = 0
+
+    # Hedging duplicates root calls that run
+    # past a latency percentile of earlier root
+    # calls. Lanes are ordered and cannot be
+    # duplicated.
+    hedge = root_task.hedge_percentile if not root_task.route_key else None
+    history = (latencies if latencies is not None else {}).setdefault(
+        iden,
+        deque(maxlen=_HEDGE_HISTORY))
+
+    started   = dict[futures.Future, float]()
+    hedgeable = dict[futures.Future, tuple[typing.Callable, tuple[tuple, dict]]]()
+    twins     = dict[futures.Future, futures.Future]()
+    abandoned = set[futures.Future]()
+    is_root   = dict[futures.Future, bool]()
 
-    with tpool:
+    def submit(fn, callargs):
+        nonlocal tpool, tpool_calls
+        call = (fn, callargs)
+
+        # Threads are retired as a pool. Calls
+        # already running finish on the old pool
+        # while new calls go to its replacement.
+        # Memory limits only apply to processes;
+        # retiring threads frees none of it.
+        weight = len(callargs[0][0]) if fn in (inner_lane, inner_batch) else 1
+        tpool_calls += weight
+        if max_tasks and tpool_calls > max_tasks * thread_count:
+            pools.discard(iden, thread_count, tpool)
+            retired.append(
+                threading.Thread(target=tpool.shutdown, daemon=True))
+            retired[-1].start()
+            tpool = pools.get(iden, thread_count)
+            tpool_calls = weight
+
+        # Transform callable if it is a
+        # coroutine. It is run on the loop
+        # owned by the worker thread.
+        if inspect.iscoroutinefunction(fn):
+            callargs = ((fn(*callargs[0], **callargs[1]),), {})
+            fn = _handle_coroutine
+
+        # Calls request threads from this batch's
+        # queue, whichever pool runs them.
+        try:
+            future = tpool.submit(_run_with_queue, tqueue, fn, *callargs[0], **callargs[1])
+        except RuntimeError:
+            # Another batch of this task retired
+            # the pool.
+            tpool = pools.get(iden, thread_count)
+            future = tpool.submit(_run_with_queue, tqueue, fn, *callargs[0], **callargs[1])
+        started[future] = time.monotonic()
+        if hedge and call[0] is inner:
+            hedgeable[future] = call
+            is_root[future] = True
+        return future
+
+    try:
+        submitted = set[futures.Future]()
         while True:
+            limit = scaler.limit if scaler else thread_count
 
-            next_calls = []
+            # Thread requests are drained as soon
+            # as possible so requesting threads
+            # are not left waiting on the queue.
             while len(tqueue):
-                next_calls.append(tqueue.pop())
+                submitted.add(submit(*tqueue.pop()))
+            while pending and len(submitted) < limit:
+                if cancel_event.is_set():
+                    pending.clear()
+                    break
+                submitted.add(submit(*pending.popleft()))
 
-            submitted = []
-            for fn, callargs in next_calls:
-                # Transform callable if it is a
-                # coroutine.
-                if inspect.iscoroutinefunction(fn):
-                    callargs = ((fn(*callargs[0], **callargs[1]), True), {})
-                    fn = _handle_coroutine
+            if not submitted:
+                break
 
-                # Submit function call to executor.
-                submitted.append(tpool.submit(fn, *callargs[0], **callargs[1]))
+            # Forget retired pools which finished
+            # shutting down.
+            retired[:] = [r for r in retired if r.is_alive()]
 
             # Await results from futures.
-            results = futures.wait(submitted, 30, "FIRST_EXCEPTION")
-            for result in results.done:
+            done, submitted = futures.wait( #type: ignore[assignment]
+                submitted,
+                _THREAD_POLL_INTERVAL,
+                "FIRST_COMPLETED")
+            for result in done:
+                latency = time.monotonic() - started.pop(result)
+                hedgeable.pop(result, None)
+
+                # The other copy of this call
+                # finished first.
+                if result in abandoned:
+                    abandoned.discard(result)
+                    is_root.pop(result, None)
+                    continue
+
+                twin = twins.pop(result, None)
+                if twin:
+                    twins.pop(twin, None)
+                    hedgeable.pop(twin, None)
+                    twin.cancel()
+                    submitted.discard(twin)
+                    abandoned.add(twin)
+
+                if scaler:
+                    scaler.record(latency)
+                if is_root.pop(result, False):
+                    history.append(latency)
                 result.result()
 
-            if not len(tqueue):
-                break
+            # The last calls of a batch leave threads
+            # idle, which says nothing about the
+            # limit later batches should use.
+            if scaler and pending:
+                scaler.adjust(len(pending) + len(submitted) + len(tqueue))
+            if hedge and len(history) >= _HEDGE_MIN_SAMPLES:
+                _hedge_stragglers(
+                    submitted,
+                    limit,
+                    _percentile(history, hedge),
+                    started,
+                    hedgeable,
+                    twins,
+                    submit)
+    finally:
+        # Calls which lost to their duplicate
+        # cannot be interrupted. Their pool drops
+        # queued work now and its threads exit
+        # once those calls return.
+        if any(not f.done() for f in abandoned):
+            pools.discard(iden, thread_count, tpool)
+            tpool.shutdown(wait=False, cancel_futures=True)
+            threading.Thread(target=tpool.shutdown, daemon=True).start()
+        elif owns_pools:
+            pools.shutdown()
+        for retiring in retired:
+            retiring.join()
+
+
+def _run_with_queue(tqueue: TaskQueue, fn: typing.Callable, /, *args, **kwds):
+    """
+    Runs `fn` with `tqueue` taking the thread
+    requests of the calls it makes.
+    """
+
+    token = _THREAD_QUEUE.set(tqueue)
+    try:
+        return fn(*args, **kwds)
+    finally:
+        _THREAD_QUEUE.reset(token)
+
+
+def _percentile(samples: typing.Iterable[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+
+def _hedge_stragglers(
+        submitted: set[futures.Future],
+        limit: int,
+        threshold: float,
+        started: dict[futures.Future, float],
+        hedgeable: dict[futures.Future, tuple[typing.Callable, tuple[tuple, dict]]],
+        twins: dict[futures.Future, futures.Future],
+        submit: typing.Callable[..., futures.Future]):
+    """
+    Launches a duplicate of each call running
+    longer than `threshold` while there are idle
+    threads.
+    """
+
+    now = time.monotonic()
+    for future in list(submitted):
+        if len(submitted) >= limit:
+            return
+        if future in twins or future not in hedgeable:
+            continue
+        if now - started[future] <= threshold:
+            continue
+
+        twin = submit(*hedgeable[future])
+        twins[future] = twin
+        twins[twin] = future
+        submitted.add(twin)
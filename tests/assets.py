@@ -0,0 +1,55 @@
+"""
+Task callables referenced by identifier from
+the test suite.
+"""
+
+import asyncio, os, threading, time
+
+# The process that imported this module, to
+# tell preloaded workers from the rest.
+IMPORT_PID = os.getpid()
+
+
+def say_hello(_, name, age=None):
+    return f"Hello, {name}!"
+
+
+async def asay_hello(_, name):
+    return f"Hello, {name}!"
+
+
+async def delay_greet(_, name):
+    await asyncio.sleep(0.01)
+    return f"Hello, {name}!"
+
+
+def empty_params(_):
+    ...
+
+
+def record_pid(_, path):
+    with open(path, "a") as pids:
+        pids.write(f"{os.getpid()}\n")
+
+
+def nap(_, seconds):
+    time.sleep(float(seconds))
+
+
+def record_import_pid(_, path):
+    with open(path, "a") as pids:
+        pids.write(f"{os.getpid()} {IMPORT_PID}\n")
+
+
+def record_type(_, path, value: int):
+    with open(path, "a") as types:
+        types.write(f"{type(value).__name__}\n")
+
+
+def first_key(key, *_):
+    return key
+
+
+def record_key(_, path, key, value):
+    with open(path, "a") as keys:
+        keys.write(f"{os.getpid()}-{threading.get_ident()} {key} {value}\n")
@@ -0,0 +1,6 @@
+"""
+Task callables re-exported from the module
+which defines them.
+"""
+
+from assets import say_hello
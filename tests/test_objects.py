@@ -1,8 +1,35 @@
-from tasxnat.protocols import Taskable, TaskBroker, TaskedCallable
+import asyncio, inspect, itertools, json, os, pickle, socket, sys, threading, time
+from concurrent import futures
+
+import pytest
+
+from tasxnat.protocols import\
+(
+    Serializer,
+    Taskable,
+    TaskBroker,
+    TaskContext,
+    TaskedCallable
+)
+from tasxnat.distributed import *
+from tasxnat.distributed import _recv_message, _send_message
 from tasxnat.objects import *
+from tasxnat.serializers import *
+from tasxnat.tracing import *
+from tasxnat.utilities import _parallel_engine
 from tasxnat.objects import _simple_identifier
 
 
+def route_known_keys(key):
+    if key == "unknown":
+        raise KeyError(key)
+    return key
+
+
+def route_first(key, *_):
+    return key
+
+
 class TestTaskableObjects:
 
     def test_can_build_from_callable(self, taskable: Taskable):
@@ -26,6 +53,26 @@ class TestTaskableObjects:
             f"Expected a specific failing message, got {bad_taskable.failure[0]!r}"
 
 
+    def test_signature_skips_taskable(self):
+        taskable = SimpleTaskable.from_callable(
+            object, #type: ignore
+            lambda task, count, *rest: None,
+            None,
+            None,
+            None)
+        assert list(taskable.signature.parameters) == ["count", "rest"],\
+            "Expected the taskable parameter to be dropped."
+
+        taskable = SimpleTaskable.from_callable(
+            object, #type: ignore
+            lambda *args: None,
+            None,
+            None,
+            None)
+        assert list(taskable.signature.parameters) == ["args"],\
+            "Expected *args to be kept."
+
+
 class TestTaskBrokerObjects:
 
     def test_can_build(self, task_broker: TaskBroker):
@@ -87,7 +134,7 @@ class TestTaskBrokerObjects:
 
     def test_can_push_after(self, task_broker: TaskBroker):
 
-        def some_after_task(tasked: TaskedCallable):
+        def some_after_task(tasked: TaskContext):
             word, *args = tasked.args
             word += " Red"
             tasked.args = (word, *args)
@@ -99,3 +146,1151 @@ class TestTaskBrokerObjects:
 
         identifier = _simple_identifier(taskable_func)
         task_broker.process_tasks(f"{identifier}[Little]")
+
+    def test_can_lazy_register_task(self, task_broker: TaskBroker):
+        sys.modules.pop("assets", None)
+        task_broker.lazy_task("assets:say_hello", is_strict=True)
+
+        assert "assets" not in sys.modules,\
+            "Lazy tasks should not be imported on registration."
+
+        task_broker.process_tasks("assets:say_hello[Keenan]")
+
+        assert "assets" in sys.modules,\
+            "Lazy tasks should be imported on first use."
+        assert "assets:say_hello" in task_broker.import_report,\
+            "Expected import time of lazy task to be reported."
+
+    def test_can_lazy_register_reexported_task(self, task_broker: TaskBroker):
+        task_broker.lazy_task("reexports:say_hello", is_strict=True)
+        task_broker.process_tasks("reexports:say_hello[Keenan]")
+
+        task = task_broker._get_task("reexports:say_hello")
+        assert task.identifier == "assets:say_hello",\
+            f"Expected the task to keep its own identifier, got {task.identifier!r}"
+        assert task_broker._get_task("assets:say_hello") is task,\
+            "Expected one task for both identifiers."
+
+    def test_can_push_async_hooks(self, task_broker: TaskBroker):
+        called = []
+
+        def some_before_task(tasked: TaskContext):
+            called.append("before")
+
+        async def some_after_task(context: TaskContext):
+            called.append("after")
+
+        @task_broker.after(some_after_task)
+        @task_broker.before(some_before_task)
+        @task_broker.task(is_strict=True)
+        async def taskable_func(_, *args, **kwds):
+            called.append("task")
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(f"{identifier}[Little]")
+
+        assert called == ["before", "task", "after"],\
+            f"Expected hooks to run around the task, got {called!r}"
+
+    def test_independent_hooks_run_together(self, task_broker: TaskBroker):
+        called = []
+
+        async def slow_hook(context: TaskContext):
+            await asyncio.sleep(0.1)
+            called.append("async")
+
+        def blocking_hook(context: TaskContext):
+            time.sleep(0.1)
+            called.append("sync")
+
+        def last_hook(context: TaskContext):
+            called.append("last")
+
+        @task_broker.before(slow_hook, independent=True)
+        @task_broker.before(blocking_hook, independent=True)
+        @task_broker.before(slow_hook, independent=True)
+        @task_broker.before(last_hook)
+        @task_broker.task(is_strict=True)
+        async def taskable_func(_, *args, **kwds):
+            called.append("task")
+
+        identifier = _simple_identifier(taskable_func)
+        start_t = time.monotonic()
+        task_broker.process_tasks(f"{identifier}[Little]")
+        elapsed = time.monotonic() - start_t
+
+        assert sorted(called[:3]) == ["async", "async", "sync"],\
+            f"Expected independent hooks to run first, got {called!r}"
+        assert called[3:] == ["last", "task"],\
+            f"Expected dependent hooks to wait on them, got {called!r}"
+        assert elapsed < 0.25,\
+            f"Expected independent hooks to run concurrently, took {elapsed:.2f}s"
+
+    def test_independent_hooks_per_stack(self, task_broker: TaskBroker):
+        called = []
+
+        class UnhashableHook:
+            __hash__ = None #type: ignore[assignment]
+
+            def __call__(self, context: TaskContext):
+                called.append("unhashable")
+
+        async def slow_hook(context: TaskContext):
+            await asyncio.sleep(0.05)
+            called.append("slow")
+
+        async def fast_hook(context: TaskContext):
+            called.append("fast")
+
+        @task_broker.task(is_strict=True)
+        async def taskable_func(_, *args, **kwds):
+            called.append("task")
+
+        # Independent before the call only.
+        task = task_broker._get_task(_simple_identifier(taskable_func))
+        task._task.push_before(UnhashableHook())
+        task._task.push_before(slow_hook, independent=True)
+        task._task.push_after(fast_hook, independent=True)
+        task._task.push_after(slow_hook)
+
+        task_broker.process_tasks(f"{_simple_identifier(taskable_func)}[Little]")
+
+        assert called == ["slow", "unhashable", "task", "slow", "fast"],\
+            f"Expected hooks to keep their independence per stack, got {called!r}"
+
+    def test_can_call_concurrently(self, task_broker: TaskBroker):
+        seen = []
+
+        def some_before_task(context: TaskContext):
+            time.sleep(0.01)
+            context.args = (context.args[0] * 2,)
+
+        @task_broker.before(some_before_task)
+        @task_broker.task(is_strict=True, thread_count=4)
+        def taskable_func(_, value):
+            seen.append(int(value))
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(8)])
+
+        assert sorted(seen) == [int(f"{n}{n}") for n in range(8)],\
+            f"Expected each call to keep its own callargs, got {seen!r}"
+
+    def test_threads_reuse_event_loops(self, task_broker: TaskBroker):
+        loops = set()
+
+        @task_broker.task(is_strict=True, thread_count=2)
+        async def taskable_func(_, *args, **kwds):
+            loops.add(asyncio.get_running_loop())
+
+        identifier = _simple_identifier(taskable_func)
+        for _ in range(2):
+            task_broker.process_tasks(
+                *[f"{identifier}[{n}]" for n in range(8)])
+
+        assert 0 < len(loops) <= 2,\
+            f"Expected at most one event loop per thread, got {len(loops)}"
+        assert not any(loop.is_closed() for loop in loops),\
+            "Expected event loops to outlive the batch."
+
+        task_broker.shutdown()
+        assert all(loop.is_closed() for loop in loops),\
+            "Expected event loops to close with the thread pool."
+
+    def test_threads_run_coroutines_together(self, task_broker: TaskBroker):
+
+        @task_broker.task(is_strict=True, thread_count=2)
+        async def taskable_func(_, *args):
+            await asyncio.sleep(0.05)
+
+        identifier = _simple_identifier(taskable_func)
+        start_t = time.monotonic()
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(64)])
+        elapsed = time.monotonic() - start_t
+        task_broker.shutdown()
+
+        assert elapsed < 0.5,\
+            f"Expected each thread to run its calls concurrently, took {elapsed:.2f}s"
+
+    def test_can_submit_task(self, task_broker: TaskBroker):
+
+        @task_broker.task
+        def taskable_func(_, word):
+            return f"Little {word}"
+
+        identifier = _simple_identifier(taskable_func)
+        try:
+            future = task_broker.submit(identifier, "Red")
+            assert future.result(5) == "Little Red",\
+                "Expected the task return value from the future."
+        finally:
+            task_broker.shutdown()
+
+    def test_can_asubmit_task(self, task_broker: TaskBroker):
+
+        @task_broker.task
+        async def taskable_func(_, word):
+            return f"Little {word}"
+
+        identifier = _simple_identifier(taskable_func)
+        try:
+            result = asyncio.run(task_broker.asubmit(identifier, "Red"))
+            assert result == "Little Red",\
+                "Expected the task return value when awaited."
+        finally:
+            task_broker.shutdown()
+
+    def test_submit_bad_task_panics(self,
+                                    task_broker: TaskBroker,
+                                    bad_taskable: Taskable):
+        task_broker.register_task(bad_taskable)
+
+        try:
+            future = task_broker.submit(bad_taskable.identifier)
+            assert isinstance(future.exception(5), RuntimeError),\
+                "Bad test Taskable is expected to throw a RuntimeError."
+        finally:
+            task_broker.shutdown()
+
+    def test_can_submit_task_to_process(self):
+        task_broker = SimpleTaskBroker(executor_mode="process")
+        task_broker.lazy_task("assets:say_hello")
+
+        try:
+            future = task_broker.submit("assets:say_hello", "Keenan")
+            assert future.result(30) == "Hello, Keenan!",\
+                "Expected the task return value from the worker process."
+        finally:
+            task_broker.shutdown()
+
+    def test_can_process_adaptive_task(self, task_broker: TaskBroker):
+        seen = []
+
+        @task_broker.task(is_strict=True, thread_count=4, min_thread_count=1)
+        def taskable_func(_, value):
+            seen.append(value)
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(16)])
+
+        assert len(seen) == 16,\
+            f"Expected every call to run, got {len(seen)}"
+
+    def test_auto_executor_routes_tasks(self, task_broker: TaskBroker):
+
+        @task_broker.task(is_strict=True, executor="auto")
+        def tiny_func(_, *args):
+            ...
+
+        @task_broker.task(is_strict=True, executor="auto")
+        def sleepy_func(_, *args):
+            time.sleep(0.005)
+
+        @task_broker.task(is_strict=True, executor="auto")
+        async def async_func(_, *args):
+            ...
+
+        identifiers = [
+            _simple_identifier(fn)
+            for fn in (tiny_func, sleepy_func, async_func)]
+        task_broker.process_tasks(
+            *[f"{iden}[{n}]" for iden in identifiers for n in range(8)])
+
+        routes = [task_broker.routes[iden] for iden in identifiers]
+        assert routes == ["inline", "thread", "loop"],\
+            f"Expected tasks to be routed by their profile, got {routes!r}"
+
+    @pytest.mark.parametrize("is_async", [False, True])
+    def test_auto_executor_takes_thread_requests(
+            self,
+            task_broker: TaskBroker,
+            is_async: bool):
+        ran = []
+
+        def request(task, value):
+            task.request_new_thread(ran.append, ((value,), {}))
+
+        if is_async:
+            async def taskable_func(task, value):
+                request(task, value)
+        else:
+            def taskable_func(task, value):
+                request(task, value)
+        task_broker.task(is_strict=True, thread_count=2, executor="auto")(taskable_func)
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(*[f"{identifier}[{n}]" for n in range(16)])
+        task_broker.shutdown()
+
+        assert task_broker.routes[identifier] == "thread",\
+            f"Expected a thread pool engine, got {task_broker.routes!r}"
+        assert sorted(map(int, ran)) == list(range(16)),\
+            f"Expected every thread request to run, got {ran!r}"
+
+    def test_parallel_executor_free_threads(
+            self,
+            task_broker: TaskBroker,
+            monkeypatch):
+
+        # Stand in for runtimes this interpreter
+        # may not be.
+        monkeypatch.setattr(
+            "tasxnat.objects._parallel_engine",
+            lambda: "free_thread")
+        seen = []
+
+        @task_broker.task(executor="parallel")
+        def taskable_func(_, value: int):
+            seen.append(value)
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(16)],
+            process_count=2)
+
+        assert task_broker.routes[identifier] == "free_thread",\
+            f"Expected the free_thread engine, got {task_broker.routes!r}"
+        assert sorted(seen) == list(range(16)),\
+            f"Expected every call to run, got {seen!r}"
+
+    @pytest.mark.parametrize("engine", ["process", "interpreter"])
+    def test_parallel_executor_keeps_routes(self, tmp_path, monkeypatch, engine: str):
+        import assets
+
+        # Interpreters stand in as threads of this
+        # process.
+        monkeypatch.setattr(
+            futures,
+            "InterpreterPoolExecutor",
+            futures.ThreadPoolExecutor,
+            raising=False)
+        monkeypatch.setattr("tasxnat.objects._WORKER_BROKER", None)
+        monkeypatch.setattr("tasxnat.objects._parallel_engine", lambda: engine)
+
+        keys_path = tmp_path / "keys"
+        task_broker = SimpleTaskBroker()
+        task_broker.lazy_task(
+            "assets:record_key",
+            executor="parallel",
+            route_key=assets.first_key)
+        task_broker.process_tasks(
+            *[f"assets:record_key[{keys_path} {key} {n}]"
+              for n in range(16) for key in "abcde"],
+            process_count=2)
+
+        seen = dict[str, list]()
+        for line in keys_path.read_text().splitlines():
+            worker, key, value = line.split()
+            seen.setdefault(key, []).append((worker, int(value)))
+        for key, calls in seen.items():
+            workers, values = zip(*calls)
+            assert len(set(workers)) == 1,\
+                f"Expected calls for {key!r} to share a worker, got {set(workers)!r}"
+            assert list(values) == list(range(16)),\
+                f"Expected calls for {key!r} to keep their order, got {values!r}"
+
+    def test_parallel_executor_interpreters(self, tmp_path, monkeypatch):
+        shared = []
+
+        # Stands in for an interpreter pool. Only
+        # what pickles crosses into interpreters.
+        class SharingExecutor(futures.ThreadPoolExecutor):
+
+            def __init__(self, max_workers, *, initializer, initargs):
+                initializer, initargs = pickle.loads(
+                    pickle.dumps((initializer, initargs)))
+                super().__init__(
+                    max_workers,
+                    initializer=initializer,
+                    initargs=initargs)
+
+            def submit(self, fn, /, *args, **kwds):
+                shared.append(fn)
+                fn, args, kwds = pickle.loads(pickle.dumps((fn, args, kwds)))
+                return super().submit(fn, *args, **kwds)
+
+        monkeypatch.setattr(
+            futures,
+            "InterpreterPoolExecutor",
+            SharingExecutor,
+            raising=False)
+        # Workers here share this interpreter.
+        monkeypatch.setattr("tasxnat.objects._WORKER_BROKER", None)
+        monkeypatch.setattr(
+            "tasxnat.objects._parallel_engine",
+            lambda: "interpreter")
+
+        pids_path = tmp_path / "pids"
+        task_broker = SimpleTaskBroker()
+        task_broker.lazy_task("assets:record_pid", executor="parallel")
+        task_broker.process_tasks(
+            *[f"assets:record_pid[{pids_path}]" for _ in range(16)],
+            process_count=2)
+
+        assert task_broker.routes["assets:record_pid"] == "interpreter",\
+            f"Expected the interpreter engine, got {task_broker.routes!r}"
+        assert not any(inspect.ismethod(fn) for fn in shared),\
+            "Expected module level callables to be shared, not the broker."
+        assert len(pids_path.read_text().split()) == 16,\
+            "Expected every call to run."
+
+    @pytest.mark.skipif(
+        not hasattr(futures, "InterpreterPoolExecutor"),
+        reason="Requires concurrent.futures.InterpreterPoolExecutor.")
+    def test_parallel_executor_real_interpreters(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            "tasxnat.objects._parallel_engine",
+            lambda: "interpreter")
+
+        pids_path = tmp_path / "pids"
+        task_broker = SimpleTaskBroker()
+        task_broker.lazy_task("assets:record_pid", executor="parallel")
+        task_broker.process_tasks(
+            *[f"assets:record_pid[{pids_path}]" for _ in range(16)],
+            process_count=2)
+
+        pids = pids_path.read_text().split()
+        assert pids == [str(os.getpid())] * 16,\
+            f"Expected every call to run in this process, got {pids!r}"
+
+    def test_parallel_executor_falls_back(self, tmp_path):
+        pids_path = tmp_path / "pids"
+        task_broker = SimpleTaskBroker()
+        task_broker.lazy_task("assets:record_pid", executor="parallel")
+        task_broker.process_tasks(
+            *[f"assets:record_pid[{pids_path}]" for _ in range(8)],
+            process_count=2)
+
+        assert task_broker.routes["assets:record_pid"] == _parallel_engine(),\
+            "Expected the engine detected for this runtime."
+        assert len(pids_path.read_text().split()) == 8,\
+            "Expected every call to run."
+
+    def test_resources_setup_per_thread(self, task_broker: TaskBroker):
+        made, released = [], []
+
+        def setup():
+            made.append(object())
+            return made[-1]
+
+        @task_broker.task(
+            is_strict=True,
+            thread_count=2,
+            setup=setup,
+            teardown=released.append)
+        def taskable_func(task, *args):
+            assert task.resource in made,\
+                "Expected the resource made by setup."
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(16)])
+
+        assert 0 < len(made) <= 2,\
+            f"Expected one resource per thread, got {len(made)}"
+
+        task_broker.shutdown()
+        assert sorted(map(id, released)) == sorted(map(id, made)),\
+            "Expected resources to be torn down with their threads."
+
+    def test_can_schedule_task(self, task_broker: TaskBroker):
+        ran_at = []
+
+        @task_broker.task
+        def taskable_func(_, label):
+            ran_at.append((label, time.monotonic()))
+
+        identifier = _simple_identifier(taskable_func)
+        try:
+            start_t = time.monotonic()
+            delayed = task_broker.schedule(
+                f"{identifier}[delayed]",
+                at=time.time() + 0.1)
+            periodic = task_broker.schedule(f"{identifier}[periodic]", every=0.02)
+            cancelled = task_broker.schedule(f"{identifier}[cancelled]", every=0.05)
+            cancelled.cancel()
+
+            time.sleep(0.3)
+            periodic.cancel()
+            delayed.future.result(5)
+        finally:
+            task_broker.shutdown()
+
+        labels = [label for label, _ in ran_at]
+        assert labels.count("delayed") == 1,\
+            "Expected the delayed call to run once."
+        assert [t for label, t in ran_at if label == "delayed"][0] - start_t >= 0.09,\
+            "Expected the delayed call to wait until its time."
+        assert labels.count("periodic") > 3,\
+            f"Expected the periodic call to repeat, got {labels.count('periodic')}"
+        assert "cancelled" not in labels,\
+            "Expected the cancelled call not to run."
+
+    def test_schedule_many_calls(self, task_broker: TaskBroker):
+        counter = itertools.count()
+
+        @task_broker.task
+        def taskable_func(_, *args):
+            next(counter)
+
+        identifier = _simple_identifier(taskable_func)
+        try:
+            calls = [
+                task_broker.schedule(f"{identifier}[{n}]", at=time.time())
+                for n in range(10_000)]
+            for call in calls:
+                while not call.future:
+                    time.sleep(0.01)
+                call.future.result(5)
+        finally:
+            task_broker.shutdown()
+
+        assert next(counter) == 10_000,\
+            "Expected every scheduled call to run."
+
+    def test_schedule_survives_dispatch_errors(self, task_broker: TaskBroker):
+        ran = []
+
+        @task_broker.task(route_key=route_known_keys)
+        def taskable_func(_, key):
+            ran.append(key)
+
+        identifier = _simple_identifier(taskable_func)
+        try:
+            failed = task_broker.schedule(f"{identifier}[unknown]", at=time.time())
+            time.sleep(0.05)
+
+            # A scheduler which died is started again.
+            dead = threading.Thread(target=lambda: None)
+            dead.start()
+            dead.join()
+            task_broker._scheduler = dead
+
+            known = task_broker.schedule(f"{identifier}[known]", at=time.time())
+            while not known.future:
+                time.sleep(0.01)
+            known.future.result(5)
+        finally:
+            task_broker.shutdown()
+
+        assert isinstance(failed.error, KeyError),\
+            f"Expected the dispatch error to be recorded, got {failed.error!r}"
+        assert isinstance(failed.future.exception(), KeyError),\
+            "Expected the run's future to fail with the dispatch error."
+        assert ran == ["known"],\
+            f"Expected later calls to still run, got {ran!r}"
+
+    def test_calls_coerced_before_dispatch(self, task_broker: TaskBroker):
+        received = []
+
+        @task_broker.task(is_strict=True)
+        def taskable_func(_, count: int, flag: bool | None = None):
+            received.append((count, flag))
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(f"{identifier}[3 flag=true]")
+        assert received == [(3, True)],\
+            f"Expected typed arguments, got {received!r}"
+
+        with pytest.raises(ValueError):
+            task_broker.process_tasks(
+                f"{identifier}[4]",
+                f"{identifier}[four]")
+        assert received == [(3, True)],\
+            "Expected invalid calls to be rejected before any call runs."
+
+    def test_custom_callable_class(self, task_broker: TaskBroker):
+        received = []
+
+        class CustomCallable(TaskedCallable):
+            is_async = False
+
+            @property
+            def taskable(self):
+                return self._parent
+
+            def push_before(self, fn, *, independent=False):
+                ...
+
+            def push_after(self, fn, *, independent=False):
+                ...
+
+            def __init__(self, parent, fn, **kwds):
+                self._parent, self._fn = parent, fn
+
+            def __call__(self, *args, **kwds):
+                return self._fn(self._parent, *args, **kwds)
+
+            def invoke(self, context):
+                return self(*context.args, **context.kwds)
+
+            def __before__(self, context):
+                ...
+
+            def __after__(self, context):
+                ...
+
+        class CustomTaskable(SimpleTaskable):
+            callable_class = CustomCallable
+
+        @task_broker.task(klass=CustomTaskable, is_strict=True)
+        def taskable_func(_, count: int):
+            received.append(count)
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(f"{identifier}[3]")
+        assert received == [3],\
+            f"Expected custom callables to be registered and coerced, got {received!r}"
+
+    def test_threads_recycled_after_max_tasks(self):
+        task_broker = SimpleTaskBroker(max_tasks_per_worker=2)
+        made, released = [], []
+
+        def setup():
+            made.append(object())
+            return made[-1]
+
+        @task_broker.task(
+            is_strict=True,
+            thread_count=2,
+            setup=setup,
+            teardown=released.append)
+        def taskable_func(task, *args):
+            assert task.resource in made,\
+                "Expected the resource made by setup."
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(16)])
+
+        assert len(made) > 2,\
+            f"Expected retired threads to be replaced, got {len(made)}"
+
+        task_broker.shutdown()
+        assert sorted(map(id, released)) == sorted(map(id, made)),\
+            "Expected resources to be torn down with retired threads."
+
+    def test_threads_kept_over_memory_limit(self):
+        task_broker = SimpleTaskBroker(max_worker_memory=1)
+        made = []
+
+        @task_broker.task(is_strict=True, thread_count=2, setup=object)
+        def taskable_func(task, *args):
+            made.append(task.resource)
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(64)])
+
+        assert len({id(resource) for resource in made}) <= 2,\
+            "Expected threads not to be retired for process memory."
+
+    def test_route_key_keeps_thread_and_order(self, task_broker: TaskBroker):
+        seen = dict[str, list]()
+
+        @task_broker.task(
+            is_strict=True,
+            thread_count=4,
+            route_key=route_first)
+        def taskable_func(_, key, value):
+            seen.setdefault(key, []).append(
+                (threading.current_thread().name, int(value)))
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{key} {n}]" for n in range(8) for key in "abcdef"])
+
+        for key, calls in seen.items():
+            threads, values = zip(*calls)
+            assert len(set(threads)) == 1,\
+                f"Expected calls for {key!r} to share a thread, got {threads!r}"
+            assert list(values) == sorted(values),\
+                f"Expected calls for {key!r} to keep their order, got {values!r}"
+
+    def test_route_key_submit_keeps_thread(self, task_broker: TaskBroker):
+
+        @task_broker.task(route_key=route_first)
+        def taskable_func(_, key):
+            return threading.current_thread().name
+
+        identifier = _simple_identifier(taskable_func)
+        try:
+            names = [
+                task_broker.submit(identifier, "a").result(5)
+                for _ in range(8)]
+        finally:
+            task_broker.shutdown()
+
+        assert len(set(names)) == 1,\
+            f"Expected calls for one key to share a thread, got {names!r}"
+
+    def test_route_key_defined_at_module_level(self, task_broker: TaskBroker):
+        with pytest.raises(ValueError):
+            @task_broker.task(route_key=lambda key: key)
+            def taskable_func(_, key):
+                ...
+
+        with pytest.raises(ValueError):
+            task_broker.lazy_task("assets:say_hello", route_key=lambda name: name)
+
+    def test_hedged_task_skips_straggler(self, task_broker: TaskBroker):
+        attempts = dict[str, int]()
+
+        @task_broker.task(is_strict=True, thread_count=4, hedge_percentile=0.9)
+        def taskable_func(_, value):
+            attempts[value] = attempts.get(value, 0) + 1
+            if value == "slow" and attempts[value] == 1:
+                time.sleep(1)
+
+        identifier = _simple_identifier(taskable_func)
+        start_t = time.monotonic()
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(32)],
+            f"{identifier}[slow]")
+        elapsed = time.monotonic() - start_t
+
+        assert attempts["slow"] == 2,\
+            "Expected the straggling call to be duplicated."
+        assert elapsed < 0.9,\
+            f"Expected the duplicate to finish first, took {elapsed:.2f}s"
+
+    def test_hedge_history_per_broker(self, task_broker: TaskBroker):
+
+        @task_broker.task(is_strict=True, thread_count=2, hedge_percentile=0.9)
+        def taskable_func(task, value):
+            task.request_new_thread(time.sleep, ((0.001,), {}))
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(8)])
+        task_broker.shutdown()
+
+        history = task_broker.__latencies__[identifier]
+        assert len(history) == 8,\
+            f"Expected only top-level calls to be recorded, got {len(history)}"
+        assert not SimpleTaskBroker().__latencies__,\
+            "Expected latency history not to be shared between brokers."
+
+    def test_thread_scaler_kept_between_batches(self, task_broker: TaskBroker):
+
+        @task_broker.task(is_strict=True, thread_count=16, min_thread_count=1)
+        def taskable_func(_, value):
+            time.sleep(0.02)
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(*[f"{identifier}[{n}]" for n in range(64)])
+        scaler = task_broker.__scalers__[(identifier, 16)]
+        limit = scaler.limit
+        task_broker.process_tasks(*[f"{identifier}[{n}]" for n in range(64)])
+        task_broker.shutdown()
+
+        assert task_broker.__scalers__[(identifier, 16)] is scaler,\
+            "Expected one scaler for every batch of the task."
+        assert limit > 1,\
+            f"Expected the next batch to start from the learned limit, got {limit}"
+
+    def test_thread_requests_outside_batch(self, task_broker: TaskBroker):
+
+        @task_broker.task(thread_count=2)
+        def taskable_func(task):
+            task.request_new_thread(lambda: None, ((), {}))
+
+        identifier = _simple_identifier(taskable_func)
+        task = task_broker._get_task(identifier)
+        with pytest.raises(RuntimeError):
+            task.request_new_thread(lambda: None, ((), {}))
+
+        context = task.invoke()
+        assert isinstance(context.failure[1], RuntimeError),\
+            f"Expected calls outside a thread pool to fail, got {context.failure!r}"
+
+    def test_thread_requests_per_batch(self, task_broker: TaskBroker):
+        ran = []
+
+        @task_broker.task(is_strict=True, thread_count=4)
+        def taskable_func(task, value):
+            time.sleep(0.01)
+            task.request_new_thread(ran.append, ((value,), {}))
+
+        # A short batch starts and ends while a
+        # long one is still requesting threads.
+        identifier = _simple_identifier(taskable_func)
+        long_batch = threading.Thread(
+            target=task_broker.process_tasks,
+            args=[f"{identifier}[{n}]" for n in range(1, 64)])
+        long_batch.start()
+        time.sleep(0.02)
+        task_broker.process_tasks(f"{identifier}[0]")
+        long_batch.join()
+        task_broker.shutdown()
+
+        assert sorted(map(int, ran)) == list(range(64)),\
+            f"Expected every batch to run its own thread requests, got {len(ran)}"
+
+    @pytest.mark.parametrize("hedge_percentile", [0, 1, 1.5])
+    def test_hedge_percentile_checked(
+            self,
+            task_broker: TaskBroker,
+            hedge_percentile: float):
+
+        with pytest.raises(ValueError):
+            @task_broker.task(hedge_percentile=hedge_percentile)
+            def taskable_func(_, value):
+                ...
+
+    def test_pool_reports_ipc(self):
+        task_broker = SimpleTaskBroker(serializer=MarshalSerializer())
+        task_broker.lazy_task("assets:say_hello")
+        task_broker.process_tasks(
+            *[f"assets:say_hello[name{n}]" for n in range(8)],
+            process_count=2)
+
+        report = task_broker.ipc_report
+        assert report["serializer"] == "marshal",\
+            f"Expected the configured serializer, got {report!r}"
+        assert report["request_bytes"] > 0 and report["result_bytes"] > 0,\
+            f"Expected bytes in both directions to be measured, got {report!r}"
+        assert report["bytes"] == report["request_bytes"] + report["result_bytes"],\
+            f"Expected the total of both directions, got {report!r}"
+
+    def test_pool_reports_worker_imports(self):
+        task_broker = SimpleTaskBroker()
+        task_broker.lazy_task("assets:say_hello")
+        task_broker.process_tasks(
+            *[f"assets:say_hello[name{n}]" for n in range(8)],
+            process_count=2)
+
+        assert "assets:say_hello" not in task_broker.__register__,\
+            "Expected only workers to import the task."
+        assert "assets:say_hello" in task_broker.import_report,\
+            f"Expected worker imports to be reported, got {task_broker.import_report!r}"
+
+    def test_pool_installs_broker_once(self, monkeypatch):
+        pickled = itertools.count()
+        getstate = SimpleTaskBroker.__getstate__
+
+        def counting_getstate(self):
+            next(pickled)
+            return getstate(self)
+
+        monkeypatch.setattr(SimpleTaskBroker, "__getstate__", counting_getstate)
+        task_broker = SimpleTaskBroker(
+            start_method="spawn",
+            max_worker_memory=1 << 40)
+        task_broker.lazy_task("assets:say_hello")
+        task_broker.process_tasks(
+            *[f"assets:say_hello[name{n}]" for n in range(256)],
+            process_count=2)
+
+        jobs = task_broker.ipc_report["jobs"]
+        assert next(pickled) <= 2 < jobs,\
+            "Expected the broker to be sent once per worker, not per job."
+
+    def test_pool_job_error_cancels_batch(self):
+        task_broker = SimpleTaskBroker()
+        task_broker.lazy_task("assets:nap")
+        task_broker.lazy_task("assets:missing")
+
+        # The failing job never reaches a strict
+        # task, so only the parent can cancel.
+        start_t = time.monotonic()
+        with pytest.raises(AttributeError):
+            task_broker.process_tasks(
+                *["assets:nap[0.01]" for _ in range(200)],
+                "assets:missing",
+                process_count=2)
+        elapsed = time.monotonic() - start_t
+
+        assert elapsed < 1.5,\
+            f"Expected the failed job to cancel the batch, took {elapsed:.2f}s"
+
+    @pytest.mark.parametrize("start_method", ["fork", "spawn", "forkserver"])
+    def test_pool_start_methods(self, tmp_path, monkeypatch, start_method: str):
+        # The fork server only sees the import path
+        # it was started with.
+        monkeypatch.setenv(
+            "PYTHONPATH",
+            os.pathsep.join([os.path.dirname(__file__), *sys.path]))
+
+        pids_path = tmp_path / "pids"
+        task_broker = SimpleTaskBroker(start_method=start_method)
+        task_broker.lazy_task("assets:record_import_pid")
+        task_broker.process_tasks(
+            *[f"assets:record_import_pid[{pids_path}]" for _ in range(4)],
+            process_count=2)
+
+        context = task_broker._get_mp_context()
+        assert context.get_start_method() == start_method,\
+            f"Expected the {start_method!r} context, got {context!r}"
+
+        # Who imported the task module tells how
+        # each worker was started.
+        imports = [
+            tuple(map(int, line.split()))
+            for line in pids_path.read_text().splitlines()]
+        assert len(imports) == 4,\
+            f"Expected every call to run, got {imports!r}"
+        for pid, import_pid in imports:
+            assert pid != os.getpid(),\
+                "Expected calls to run in worker processes."
+            if start_method != "forkserver":
+                assert import_pid in (pid, os.getpid()),\
+                    "Expected workers to import or inherit the task module."
+            else:
+                assert import_pid not in (pid, os.getpid()),\
+                    "Expected the fork server to preload the task module."
+
+    def test_fork_recycling_executor_rejected(self):
+        with pytest.raises(ValueError):
+            SimpleTaskBroker(
+                executor_mode="process",
+                start_method="fork",
+                max_tasks_per_worker=2)
+
+        # Batch pools recycle forked workers.
+        SimpleTaskBroker(start_method="fork", max_tasks_per_worker=2)
+
+    def test_pool_coerces_every_job(self, tmp_path):
+        types_path = tmp_path / "types"
+
+        # Workers are never recycled here, so each
+        # runs several jobs of the lazy task.
+        task_broker = SimpleTaskBroker(max_worker_memory=1 << 40)
+        task_broker.lazy_task("assets:record_type")
+        task_broker.process_tasks(
+            *[f"assets:record_type[{types_path} {n}]" for n in range(256)],
+            process_count=2)
+
+        types = types_path.read_text().split()
+        assert task_broker.ipc_report["jobs"] > 2,\
+            "Expected workers to run several jobs."
+        assert types == ["int"] * 256,\
+            f"Expected every call to be converted, got {set(types)!r}"
+
+    @pytest.mark.parametrize(
+        "limits",
+        [{"max_tasks_per_worker": 2}, {"max_worker_memory": 1}])
+    def test_pool_recycles_workers(self, tmp_path, limits: dict):
+        pids_path = tmp_path / "pids"
+        task_broker = SimpleTaskBroker(**limits)
+        task_broker.lazy_task("assets:record_pid")
+        task_broker.process_tasks(
+            *[f"assets:record_pid[{pids_path}]" for _ in range(256)],
+            process_count=2)
+
+        pids = pids_path.read_text().split()
+        assert len(pids) == 256,\
+            f"Expected no calls to be dropped, got {len(pids)}"
+        assert len(set(pids)) > 2,\
+            f"Expected retired workers to be replaced, got {len(set(pids))}"
+
+    def test_can_submit_task_compressed(self):
+        task_broker = SimpleTaskBroker(
+            executor_mode="process",
+            serializer=CompressedSerializer(threshold=0))
+        task_broker.lazy_task("assets:say_hello")
+
+        try:
+            future = task_broker.submit("assets:say_hello", "Keenan")
+            assert future.result(30) == "Hello, Keenan!",\
+                "Expected the task return value through the serializer."
+        finally:
+            task_broker.shutdown()
+
+
+class TestSerializerObjects:
+
+    @pytest.mark.parametrize(
+        "serializer",
+        [
+            PickleSerializer(),
+            PickleSerializer(4),
+            MarshalSerializer(),
+            CompressedSerializer(threshold=0),
+            CompressedSerializer(MarshalSerializer())
+        ])
+    def test_serializer_round_trips(self, serializer: Serializer):
+        obj = [(("a", 1), {"b": 2.5}), ([b"\0" * 1024], {})]
+        data = serializer.dumps(obj)
+
+        assert isinstance(data, bytes),\
+            f"Expected {serializer.name} to produce bytes."
+        assert serializer.loads(data) == obj,\
+            f"Expected {serializer.name} to round trip."
+
+    def test_pickle_buffers_out_of_band(self):
+        serializer = PickleSerializer()
+        buffer = bytearray(b"x" * 4096)
+        data = serializer.dumps(pickle.PickleBuffer(buffer))
+
+        assert bytes(serializer.loads(data)) == bytes(buffer),\
+            "Expected out-of-band buffers to round trip."
+
+
+class TestTaskCoordinatorObjects:
+
+    @staticmethod
+    def start_brokers(coordinator: SimpleTaskCoordinator, count: int, **options):
+        for _ in range(count):
+            task_broker = SimpleTaskBroker(**options)
+            task_broker.lazy_task("assets:say_hello", is_strict=True)
+            task_broker.lazy_task("assets:empty_params", is_strict=True)
+            threading.Thread(
+                target=task_broker.serve,
+                args=(coordinator.address,),
+                kwargs={"heartbeat_interval": 0.05},
+                daemon=True).start()
+
+    def test_can_process_across_brokers(self):
+        with SimpleTaskCoordinator(chunk_size=4) as coordinator:
+            self.start_brokers(coordinator, 3)
+            results = coordinator.process_tasks(
+                *[f"assets:say_hello[name{n}]" for n in range(32)],
+                timeout=10)
+
+        assert results == [(True, f"Hello, name{n}!") for n in range(32)],\
+            "Expected every result, in call order."
+
+    def test_redispatches_from_silent_broker(self):
+        with SimpleTaskCoordinator(
+                chunk_size=4,
+                heartbeat_timeout=0.5) as coordinator:
+
+            # Takes a chunk, then never reports back
+            # nor sends heartbeats.
+            serializer = PickleSerializer()
+            silent = socket.create_connection(coordinator.address)
+            worker = threading.Thread(
+                target=coordinator.process_tasks,
+                args=[f"assets:say_hello[name{n}]" for n in range(8)],
+                daemon=True)
+            worker.start()
+            _send_message(silent, serializer, ("pull",))
+            assert _recv_message(silent, serializer)[0] == "chunk",\
+                "Expected the silent broker to be handed a chunk."
+
+            self.start_brokers(coordinator, 1)
+            worker.join(10)
+            silent.close()
+
+            assert not worker.is_alive(),\
+                "Expected the silent broker's chunk to be dispatched again."
+            assert None not in coordinator._results,\
+                "Expected every call to have a result."
+
+    def test_invalid_calls_fail_chunk(self):
+        with SimpleTaskCoordinator(chunk_size=4) as coordinator:
+            self.start_brokers(coordinator, 1)
+            results = coordinator.process_tasks(
+                "assets:say_hello[name]",
+                "assets:say_hello",
+                "assets:empty_params",
+                timeout=10)
+
+        assert [is_success for is_success, _ in results] == [False, False, True],\
+            f"Expected every call of the invalid chunk to fail, got {results!r}"
+        assert isinstance(results[0][1], TypeError),\
+            f"Expected the signature error, got {results[0][1]!r}"
+
+    def test_strict_failure_raises(self):
+        with SimpleTaskCoordinator() as coordinator:
+            self.start_brokers(coordinator, 2, strict_mode=True)
+
+            with pytest.raises(TypeError):
+                coordinator.process_tasks(
+                    "assets:say_hello[name]",
+                    "assets:empty_params[unexpected]",
+                    timeout=10)
+
+
+class TestTracerObjects:
+
+    @staticmethod
+    def read_spans(path) -> list[dict]:
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    def test_traces_calls_and_hooks(self, tmp_path):
+        trace_path = tmp_path / "trace.jsonl"
+        task_broker = SimpleTaskBroker(tracer=SimpleTracer(trace_path))
+
+        @task_broker.before(lambda context: None)
+        @task_broker.task(is_strict=True, thread_count=2)
+        def taskable_func(_, value):
+            return value
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(
+            *[f"{identifier}[{n}]" for n in range(4)])
+
+        spans = self.read_spans(trace_path)
+        by_id = {span["id"]: span for span in spans}
+        names = [span["name"] for span in spans]
+        for name in ("batch", "parse", "run", "call", "hooks.before", "body"):
+            assert name in names,\
+                f"Expected a {name!r} span, got {sorted(set(names))!r}"
+        assert names.count("call") == 4,\
+            "Expected a span for each call."
+
+        for span in spans:
+            if span["name"] == "body":
+                assert by_id[span["parent"]]["name"] == "call",\
+                    "Expected the body to be a child of its call."
+
+    def test_traces_thread_requests(self, tmp_path):
+        trace_path = tmp_path / "trace.jsonl"
+        task_broker = SimpleTaskBroker(tracer=SimpleTracer(trace_path))
+
+        @task_broker.task(is_strict=True, thread_count=2)
+        def taskable_func(task, value):
+            task.request_new_thread(lambda: None, ((), {}))
+
+        identifier = _simple_identifier(taskable_func)
+        task_broker.process_tasks(f"{identifier}[0]")
+
+        spans = self.read_spans(trace_path)
+        by_id = {span["id"]: span for span in spans}
+        for name in ("queue", "subtask"):
+            children = [span for span in spans if span["name"] == name]
+            assert children,\
+                f"Expected a {name!r} span for the thread request."
+            assert by_id[children[0]["parent"]]["name"] == "body",\
+                f"Expected the {name!r} span under the requesting call."
+
+    def test_sampling_skips_calls(self, tmp_path):
+        trace_path = tmp_path / "trace.jsonl"
+        task_broker = SimpleTaskBroker(
+            tracer=SimpleTracer(trace_path, sample_rate=0.0))
+        task_broker.lazy_task("assets:say_hello")
+        task_broker.process_tasks(
+            *[f"assets:say_hello[name{n}]" for n in range(8)])
+
+        names = {span["name"] for span in self.read_spans(trace_path)}
+        assert "batch" in names,\
+            "Expected batch spans regardless of sampling."
+        assert "call" not in names,\
+            "Expected unsampled calls to write no spans."
+
+    def test_chrome_format_loads(self, tmp_path):
+        trace_path = tmp_path / "trace.json"
+        task_broker = SimpleTaskBroker(
+            tracer=SimpleTracer(trace_path, format="chrome"))
+        task_broker.lazy_task("assets:say_hello")
+        task_broker.process_tasks(
+            *[f"assets:say_hello[name{n}]" for n in range(2)],
+            process_count=2)
+
+        # Loaders accept the unterminated array;
+        # json does not.
+        events = json.loads(trace_path.read_text().rstrip(",\n") + "]")
+        names = {event["name"] for event in events}
+        assert {"batch", "pool", "job", "call"} <= names,\
+            f"Expected spans from the pool workers, got {sorted(names)!r}"
+        assert len({event["pid"] for event in events}) > 1,\
+            "Expected worker processes to append to the same trace."
+
+    def test_rejects_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            SimpleTracer(tmp_path / "trace", format="xml") #type: ignore[arg-type]
@@ -1,4 +1,20 @@
-import string
+import asyncio, inspect, string, sys, threading, time
+from concurrent import futures
+
+import pytest
+
+from tasxnat.objects import SimpleTaskable
+from tasxnat.utilities import\
+(
+    _choose_engine,
+    _compile_coercer,
+    _parallel_engine,
+    _partition_calls,
+    _process_tasks,
+    _process_tasks_async,
+    _process_tasks_multi,
+    _ThreadScaler
+)
 
 
 class TestTaskCallParsing:
@@ -54,3 +70,214 @@ class TestTaskCallParsing:
             "Values should not found in keywords."
         assert not any([key in val for key, val in kwds.items()]),\
             "Keywords should not found in values."
+
+
+class TestTaskProcessing:
+
+    def test_async_calls_bounded(self):
+        running, peak = 0, 0
+
+        async def taskable_func(_, *args):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        root_task = SimpleTaskable.from_callable(
+            object, #type: ignore
+            taskable_func,
+            None,
+            True)
+        _process_tasks_async(
+            root_task,
+            [((n,), {}) for n in range(32)],
+            True,
+            concurrency=4)
+
+        assert peak == 4,\
+            f"Expected at most 4 calls at once, got {peak}"
+
+    def test_cancelled_tasks_skip_calls(self, optsmallint):
+        called = []
+        root_task = SimpleTaskable.from_callable(
+            object, #type: ignore
+            lambda _, *args: called.append(args),
+            optsmallint,
+            True)
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+
+        if root_task.thread_count <= 1:
+            _process_tasks(root_task, [(("a",), {})], True, cancel_event)
+        else:
+            _process_tasks_multi(root_task, [(("a",), {})], True, cancel_event)
+
+        assert not called,\
+            "Calls should not run once the batch is cancelled."
+
+    def test_strict_failure_cancels(self, bad_taskable):
+        cancel_event = threading.Event()
+
+        try:
+            if bad_taskable.thread_count <= 1:
+                _process_tasks(bad_taskable, [((), {})], True, cancel_event)
+            else:
+                _process_tasks_multi(
+                    bad_taskable,
+                    [((), {})],
+                    True,
+                    cancel_event)
+        except RuntimeError:
+            ...
+
+        assert cancel_event.is_set(),\
+            "Strict failures are expected to cancel the batch."
+
+
+class TestThreadScaler:
+
+    def test_scaler_grows_with_queue(self):
+        scaler = _ThreadScaler(1, 8)
+        start_t = time.monotonic()
+
+        for window in range(1, 4):
+            scaler.record(0.01)
+            scaler.adjust(100, start_t + window * scaler.window * 2)
+
+        assert scaler.limit > 1,\
+            "Expected the thread limit to grow with queued work."
+
+    def test_scaler_shrinks_without_queue(self):
+        scaler = _ThreadScaler(1, 8)
+        scaler.limit = 8
+        start_t = time.monotonic()
+
+        for window in range(1, 10):
+            scaler.record(0.01)
+            scaler.adjust(0, start_t + window * scaler.window * 2)
+
+        assert scaler.limit == 1,\
+            "Expected the thread limit to shrink without queued work."
+
+    def test_scaler_speeds_up_steps(self):
+        scaler = _ThreadScaler(1, 64)
+        start_t = time.monotonic()
+
+        for window in range(1, 5):
+            scaler.record(0.01)
+            scaler.adjust(100, start_t + window * scaler.window * 2)
+
+        assert scaler.limit > 5,\
+            f"Expected steps to grow while the direction holds, got {scaler.limit}"
+
+    def test_scaler_respects_bounds(self):
+        scaler = _ThreadScaler(2, 4)
+        start_t = time.monotonic()
+
+        for window in range(1, 20):
+            scaler.record(0.01)
+            scaler.adjust(100, start_t + window * scaler.window * 2)
+            assert 2 <= scaler.limit <= 4,\
+                f"Thread limit {scaler.limit} left its bounds."
+
+
+class TestEngineSelection:
+
+    def test_cpu_bound_selects_processes(self, monkeypatch):
+        monkeypatch.setattr(
+            "tasxnat.utilities._parallel_engine",
+            lambda: "process")
+        engine = _choose_engine([(0.01, 0.01)] * 5, False, 2)
+        assert engine == "process",\
+            f"CPU-bound tasks should run in processes, got {engine!r}"
+
+    def test_cpu_bound_selects_parallel_engine(self):
+        engine = _choose_engine([(0.01, 0.01)] * 5, False, 2)
+        assert engine == _parallel_engine(),\
+            f"CPU-bound tasks should run on the runtime's parallel engine, got {engine!r}"
+
+    def test_cpu_bound_single_process_runs_inline(self):
+        engine = _choose_engine([(0.01, 0.01)] * 5, False, 1)
+        assert engine == "inline",\
+            f"CPU-bound tasks without processes should run inline, got {engine!r}"
+
+    @pytest.mark.parametrize(
+        "samples, is_async",
+        [([(0.0, 0.0)] * 5, False), ([(0.01, 0.01)] * 5, False), ([], True)])
+    def test_threaded_tasks_keep_thread_pool(self, samples, is_async: bool):
+        engine = _choose_engine(samples, is_async, 1, True)
+        assert engine == "thread",\
+            f"Threaded tasks should run in a thread pool, got {engine!r}"
+
+
+class TestParallelEngine:
+
+    def test_free_threaded_runtime_uses_threads(self, monkeypatch):
+        monkeypatch.setattr(sys, "_is_gil_enabled", lambda: False, raising=False)
+        assert _parallel_engine() == "free_thread",\
+            "Expected free-threaded builds to run calls on threads."
+
+    def test_interpreter_pool_uses_interpreters(self, monkeypatch):
+        monkeypatch.setattr(sys, "_is_gil_enabled", lambda: True, raising=False)
+        monkeypatch.setattr(
+            futures,
+            "InterpreterPoolExecutor",
+            futures.ThreadPoolExecutor,
+            raising=False)
+        assert _parallel_engine() == "interpreter",\
+            "Expected runtimes with an interpreter pool to use it."
+
+    def test_falls_back_to_processes(self, monkeypatch):
+        monkeypatch.delattr(sys, "_is_gil_enabled", raising=False)
+        monkeypatch.delattr(futures, "InterpreterPoolExecutor", raising=False)
+        assert _parallel_engine() == "process",\
+            "Expected other runtimes to fall back to processes."
+
+
+class TestCallRouting:
+
+    def test_partition_is_stable(self):
+        calls = [((key, n), {}) for n in range(4) for key in "abc"]
+        lanes = _partition_calls(lambda key, _: key, calls, 2)
+
+        for lane in lanes:
+            keys = {args[0] for args, _ in lane}
+            for other in lanes:
+                if other is not lane:
+                    assert not keys & {args[0] for args, _ in other},\
+                        "Expected each key to map to a single lane."
+
+        assert lanes == _partition_calls(lambda key, _: key, calls, 2),\
+            "Expected partitioning to be repeatable."
+
+
+class TestCallCoercion:
+
+    @staticmethod
+    def typed_func(count: int, ratio: float, flag: bool = False, label="", *rest: int):
+        ...
+
+    def test_converts_annotated_strings(self):
+        coerce = _compile_coercer("typed", inspect.signature(self.typed_func))
+        args, kwds = coerce(("3", "0.5", "yes", "x", "7"), {})
+
+        assert args == (3, 0.5, True, "x", 7),\
+            f"Expected annotated arguments to be converted, got {args!r}"
+        assert coerce(args, kwds) == (args, kwds),\
+            "Expected converted arguments to be left as is."
+
+        _, kwds = coerce(("3", "0.5"), {"flag": "off"})
+        assert kwds == {"flag": False},\
+            f"Expected keyword arguments to be converted, got {kwds!r}"
+
+    def test_rejects_invalid_calls(self):
+        coerce = _compile_coercer("typed", inspect.signature(self.typed_func))
+
+        with pytest.raises(ValueError):
+            coerce(("three", "0.5"), {})
+        with pytest.raises(ValueError):
+            coerce(("3", "0.5", "maybe"), {})
+        with pytest.raises(TypeError):
+            coerce(("3",), {})